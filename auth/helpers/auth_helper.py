@@ -1,14 +1,223 @@
 # Utility functions for Auth Module
 import hashlib
+import threading
+import time
+from collections import OrderedDict
 import jwt
+from auth.helpers import password_helper
+
+
+class TokenCache:
+    """
+    Bounded LRU of verified token claims, keyed by the token's SHA-256.
+
+    Every lookup re-checks the token's `exp` and `nbf` against the caller's
+    own leeway, so a cached token is never accepted after it would fail
+    verification for that caller. Entries are also dropped after `max_age`
+    seconds. Entries remember the key id that signed them so retiring or
+    replacing a key drops exactly its tokens.
+    """
+
+    def __init__(self, capacity=10000, max_age=None, clock=time.time):
+        """
+        Args:
+            capacity (int): Maximum number of cached tokens.
+            max_age (float): Upper bound in seconds on how long an entry is
+                kept, also applied to tokens without `exp`. None keeps them
+                until evicted.
+            clock: Function returning the current Unix time.
+        """
+        self.capacity = capacity
+        self.max_age = max_age
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token):
+        if isinstance(token, str):
+            token = token.encode()
+        return hashlib.sha256(token).hexdigest()
+
+    def get(self, key, leeway=0):
+        """
+        Return the cached claims for `key`, or None if absent, past `max_age`,
+        or not valid at this moment with `leeway` seconds of clock skew.
+        """
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            claims, expires_at, _ = entry
+            if (expires_at is not None and now >= expires_at) or (
+                "exp" in claims and now >= float(claims["exp"]) + leeway
+            ):
+                del self._entries[key]
+                return None
+            if "nbf" in claims and now < float(claims["nbf"]) - leeway:
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, key, claims, kid=None):
+        if self.capacity <= 0:
+            return
+        expires_at = self.clock() + self.max_age if self.max_age is not None else None
+        with self._lock:
+            self._entries[key] = (claims, expires_at, kid)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token=None, kid=None):
+        """
+        Drop cached entries for one token, for every token signed with `kid`,
+        or everything when neither is given.
+
+        Returns:
+            int: Number of entries removed.
+        """
+        with self._lock:
+            if token is None and kid is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                return removed
+            digest = self.digest(token) if token is not None else None
+            stale = [
+                key for key, (_, _, entry_kid) in self._entries.items()
+                if (digest is not None and key[0] == digest) or (kid is not None and entry_kid == kid)
+            ]
+            for key in stale:
+                del self._entries[key]
+            return len(stale)
+
+    def purge(self):
+        """Remove every entry past `max_age` or its `exp` and return how many were removed."""
+        now = self.clock()
+        with self._lock:
+            expired = [
+                key for key, (claims, expires_at, _) in self._entries.items()
+                if (expires_at is not None and now >= expires_at)
+                or ("exp" in claims and now >= float(claims["exp"]))
+            ]
+            for key in expired:
+                del self._entries[key]
+            return len(expired)
+
+    def __len__(self):
+        return len(self._entries)
+
 
 class AuthHelper:
     SECRET_KEY = "your_secret_key"
+    # Signing keys by key id. Tokens carry the id in their `kid` header and
+    # are verified with that key. Tokens without one are verified with the
+    # LEGACY_KID entry (SECRET_KEY), which `retire_key(LEGACY_KID)` removes
+    # like any other key once every issuer signs with a kid.
+    LEGACY_KID = "legacy"
+    KEYS = {LEGACY_KID: SECRET_KEY}
+    ACTIVE_KID = None
+    ALGORITHM = "HS256"
+    token_cache = TokenCache()
 
     @staticmethod
     def hash_password(password):
-        return hashlib.sha256(password.encode()).hexdigest()
+        """
+        Return a salted scrypt hash, computed on the shared worker pool.
+
+        The KDF costs tens of milliseconds of CPU. It runs in a worker
+        process, but this call still blocks the calling thread until the
+        hash is ready; use `hash_password_async` on an event loop.
+        """
+        return password_helper.default_hasher().hash(password)
+
+    @staticmethod
+    def verify_password(password, encoded):
+        """
+        Check a password against a hash, including legacy unsalted SHA-256
+        digests. Blocks like `hash_password`; see `verify_password_async`.
+        """
+        return password_helper.default_hasher().verify(password, encoded)
+
+    @staticmethod
+    async def hash_password_async(password):
+        return await password_helper.default_hasher().hash_async(password)
+
+    @staticmethod
+    async def verify_password_async(password, encoded):
+        return await password_helper.default_hasher().verify_async(password, encoded)
+
+    @staticmethod
+    def needs_rehash(encoded):
+        return password_helper.needs_rehash(encoded)
 
     @staticmethod
     def generate_token(data):
-        return jwt.encode(data, AuthHelper.SECRET_KEY, algorithm="HS256")
+        if AuthHelper.ACTIVE_KID is None:
+            return jwt.encode(data, AuthHelper.KEYS[AuthHelper.LEGACY_KID], algorithm=AuthHelper.ALGORITHM)
+        return jwt.encode(
+            data,
+            AuthHelper.KEYS[AuthHelper.ACTIVE_KID],
+            algorithm=AuthHelper.ALGORITHM,
+            headers={"kid": AuthHelper.ACTIVE_KID},
+        )
+
+    @staticmethod
+    def add_key(kid, secret, activate=True):
+        """
+        Register a signing key, making it the one new tokens are signed with by
+        default. Replacing the secret of an existing `kid` drops the claims
+        cached for tokens signed with the old one.
+        """
+        if kid in AuthHelper.KEYS:
+            AuthHelper.token_cache.invalidate(kid=kid)
+        AuthHelper.KEYS[kid] = secret
+        if activate:
+            AuthHelper.ACTIVE_KID = kid
+
+    @staticmethod
+    def retire_key(kid):
+        """Stop accepting tokens signed with `kid` and drop their cached claims."""
+        AuthHelper.KEYS.pop(kid, None)
+        if AuthHelper.ACTIVE_KID == kid:
+            AuthHelper.ACTIVE_KID = None
+        AuthHelper.token_cache.invalidate(kid=kid)
+
+    @staticmethod
+    def verify_token(token, audience=None, leeway=0, use_cache=True):
+        """
+        Verify a token's signature, `exp`, `nbf` and audience, and return its claims.
+
+        Verified claims are cached, so presenting the same token again skips
+        the signature check and JSON parsing until the token expires.
+
+        Args:
+            token (str): Encoded JWT.
+            audience: Expected `aud` value, or None for tokens without one.
+            leeway (float): Seconds of clock skew tolerated on `exp`/`nbf`.
+            use_cache (bool): Consult and fill `AuthHelper.token_cache`.
+
+        Returns:
+            dict: The token's claims. Callers get their own copy.
+
+        Raises:
+            jwt.InvalidTokenError: Bad signature, unknown `kid`, expired or
+                not yet valid token, or audience mismatch.
+        """
+        key = (TokenCache.digest(token), tuple(audience) if isinstance(audience, list) else audience)
+        if use_cache:
+            claims = AuthHelper.token_cache.get(key, leeway=leeway)
+            if claims is not None:
+                return dict(claims)
+
+        kid = jwt.get_unverified_header(token).get("kid", AuthHelper.LEGACY_KID)
+        secret = AuthHelper.KEYS.get(kid)
+        if secret is None:
+            raise jwt.InvalidTokenError(f"Unknown or retired key id '{kid}'")
+        claims = jwt.decode(
+            token, secret, algorithms=[AuthHelper.ALGORITHM], audience=audience, leeway=leeway
+        )
+        if use_cache:
+            AuthHelper.token_cache.put(key, claims, kid=kid)
+        return dict(claims)
@@ -0,0 +1,201 @@
+# Salted password hashing with tunable cost, plus a process-pool front end
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+SCHEMES = ("scrypt", "pbkdf2_sha256")
+DEFAULT_SCHEME = "scrypt"
+DEFAULT_PARAMS = {
+    "scrypt": {"n": 2 ** 14, "r": 8, "p": 1},
+    "pbkdf2_sha256": {"iterations": 600000},
+}
+SALT_BYTES = 16
+KEY_BYTES = 32
+_LEGACY_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+
+
+def _b64encode(raw):
+    return base64.b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _b64decode(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def _derive(password, scheme, params, salt):
+    password = password.encode() if isinstance(password, str) else password
+    if scheme == "scrypt":
+        n, r, p = params["n"], params["r"], params["p"]
+        # Leave headroom over the 128 * n * r bytes scrypt needs.
+        return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + 1024 * 1024,
+                              dklen=KEY_BYTES)
+    if scheme == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", password, salt, params["iterations"], dklen=KEY_BYTES)
+    raise ValueError(f"Unsupported password scheme '{scheme}', expected one of {SCHEMES}")
+
+
+def parse_hash(encoded):
+    """
+    Split an encoded hash into its parts.
+
+    Hashes are stored as `scheme$name=value,...$salt$key` with base64 salt
+    and key, e.g. `scrypt$n=16384,r=8,p=1$...$...`. Unsalted hex SHA-256
+    digests from the old `AuthHelper.hash_password` parse as scheme
+    "sha256" with no parameters.
+
+    Returns:
+        tuple: (scheme, params dict, salt bytes, key bytes).
+
+    Raises:
+        ValueError: If `encoded` is not in a known format.
+    """
+    if _LEGACY_SHA256.match(encoded):
+        return "sha256", {}, b"", bytes.fromhex(encoded)
+    try:
+        scheme, params, salt, key = encoded.split("$")
+        params = {name: int(value) for name, value in (item.split("=") for item in params.split(","))}
+        return scheme, params, _b64decode(salt), _b64decode(key)
+    except ValueError:
+        raise ValueError("Unrecognized password hash format") from None
+
+
+def hash_password(password, scheme=DEFAULT_SCHEME, params=None):
+    """
+    Hash a password with a fresh random salt.
+
+    Args:
+        password (str): Plain-text password.
+        scheme (str): "scrypt" or "pbkdf2_sha256".
+        params (dict): Cost parameters, defaulting to DEFAULT_PARAMS[scheme].
+
+    Returns:
+        str: Encoded hash carrying the scheme, parameters and salt.
+    """
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unsupported password scheme '{scheme}', expected one of {SCHEMES}")
+    params = dict(params or DEFAULT_PARAMS[scheme])
+    salt = os.urandom(SALT_BYTES)
+    key = _derive(password, scheme, params, salt)
+    encoded_params = ",".join(f"{name}={value}" for name, value in params.items())
+    return f"{scheme}${encoded_params}${_b64encode(salt)}${_b64encode(key)}"
+
+
+def verify_password(password, encoded):
+    """Return True if `password` matches `encoded`, using the parameters stored in it."""
+    scheme, params, salt, key = parse_hash(encoded)
+    if scheme == "sha256":
+        password = password.encode() if isinstance(password, str) else password
+        return hmac.compare_digest(hashlib.sha256(password).digest(), key)
+    return hmac.compare_digest(_derive(password, scheme, params, salt), key)
+
+
+def needs_rehash(encoded, scheme=DEFAULT_SCHEME, params=None):
+    """Return True if `encoded` was not produced with `scheme` and exactly these parameters."""
+    current_scheme, current_params, _, _ = parse_hash(encoded)
+    return current_scheme != scheme or current_params != dict(params or DEFAULT_PARAMS[scheme])
+
+
+class PasswordHasher:
+    """
+    Hashes and verifies passwords on a process pool.
+
+    The KDF is deliberately slow, so running it inline would block the
+    caller's thread or event loop for tens of milliseconds per login. Work is
+    sent to a `ProcessPoolExecutor` sized to the machine's cores (created
+    on first use), so throughput scales with CPUs and the GIL is not a
+    bottleneck. Synchronous, asyncio and batched entry points all go
+    through the same pool.
+    """
+
+    def __init__(self, scheme=DEFAULT_SCHEME, params=None, max_workers=None):
+        """
+        Args:
+            scheme (str): Scheme used for new hashes.
+            params (dict): Cost parameters for new hashes; hashes made with
+                other parameters are reported by `needs_rehash`.
+            max_workers (int): Pool size, defaulting to `os.cpu_count()`.
+        """
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unsupported password scheme '{scheme}', expected one of {SCHEMES}")
+        self.scheme = scheme
+        self.params = dict(params or DEFAULT_PARAMS[scheme])
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def hash(self, password):
+        return self._pool().submit(hash_password, password, self.scheme, self.params).result()
+
+    def verify(self, password, encoded):
+        return self._pool().submit(verify_password, password, encoded).result()
+
+    def needs_rehash(self, encoded):
+        return needs_rehash(encoded, self.scheme, self.params)
+
+    def verify_and_update(self, password, encoded):
+        """
+        Verify a password at login and upgrade its hash if the parameters changed.
+
+        Returns:
+            tuple: (matched, new_hash). `new_hash` is a hash with the current
+            scheme and parameters that the caller should store, or None if the
+            password did not match or the stored hash is already current.
+        """
+        if not self.verify(password, encoded):
+            return False, None
+        return True, self.hash(password) if self.needs_rehash(encoded) else None
+
+    async def hash_async(self, password):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), hash_password, password, self.scheme, self.params)
+
+    async def verify_async(self, password, encoded):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), verify_password, password, encoded)
+
+    async def verify_and_update_async(self, password, encoded):
+        if not await self.verify_async(password, encoded):
+            return False, None
+        return True, await self.hash_async(password) if self.needs_rehash(encoded) else None
+
+    def hash_many(self, passwords):
+        """Hash a batch of passwords in parallel, preserving order."""
+        passwords = list(passwords)
+        return list(self._pool().map(
+            hash_password, passwords, [self.scheme] * len(passwords), [self.params] * len(passwords)
+        ))
+
+    def verify_many(self, pairs):
+        """Verify a batch of `(password, encoded)` pairs in parallel, preserving order."""
+        pairs = list(pairs)
+        return list(self._pool().map(verify_password, [p for p, _ in pairs], [e for _, e in pairs]))
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_default_hasher = None
+_default_hasher_lock = threading.Lock()
+
+
+def default_hasher():
+    """Return the process-wide `PasswordHasher` with the default scheme, creating it on first use."""
+    global _default_hasher
+    with _default_hasher_lock:
+        if _default_hasher is None:
+            _default_hasher = PasswordHasher()
+        return _default_hasher
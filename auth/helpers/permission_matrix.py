@@ -0,0 +1,150 @@
+# Compiled entity bitsets for batch authorization checks
+import threading
+from collections import OrderedDict
+
+ACTIONS = ("create", "read", "update", "delete")
+
+
+def iter_bits(mask):
+    """Yield the positions of the set bits of `mask`, lowest first."""
+    while mask:
+        lowest = mask & -mask
+        yield lowest.bit_length() - 1
+        mask ^= lowest
+
+
+class EntityIndex:
+    """
+    Dense bit positions for entity ids, assigned in first-seen order.
+
+    Masks are sized by the number of entities with permissions rather than
+    by the largest id, and any id (including negative ones) gets a bit.
+    Positions are only ever appended, so masks compiled against an index
+    stay valid for as long as that index is in use.
+    """
+
+    def __init__(self):
+        self.bits = {}
+        self.entities = []
+        self._lock = threading.Lock()
+
+    def bit(self, entity_id):
+        bit = self.bits.get(entity_id)
+        if bit is None:
+            with self._lock:
+                bit = self.bits.get(entity_id)
+                if bit is None:
+                    bit = len(self.entities)
+                    self.entities.append(entity_id)
+                    self.bits[entity_id] = bit
+        return bit
+
+
+class PermissionMatrix:
+    """
+    Per-grouping and per-user entity bitsets, one integer per CRUD action.
+
+    Each entity with permissions gets a dense bit position from an
+    `EntityIndex`. Grouping masks are compiled from the resolver's effective
+    permissions; a user's mask is the OR of their groupings' masks. Both are
+    compiled lazily and dropped selectively when the resolver reports
+    changed groupings or users, so checks are a dict lookup, a shift and a
+    mask test with no database access. A full reload starts a fresh index,
+    which drops positions of entities that lost all their permissions.
+    """
+
+    def __init__(self, resolver, max_users=10000):
+        """
+        Args:
+            resolver (PermissionResolver): Source of effective permissions and
+                memberships, and of change notifications.
+            max_users (int): Users whose compiled masks are kept; the least
+                recently checked are evicted beyond it.
+        """
+        self.resolver = resolver
+        self.max_users = max_users
+        self._lock = threading.Lock()
+        self._index = EntityIndex()
+        self._groupings = {}
+        self._users = OrderedDict()
+        self._generation = 0
+        resolver.listeners.append(self._changed)
+
+    def _changed(self, groupings, users):
+        with self._lock:
+            self._generation += 1
+            if groupings is None:
+                self._groupings.clear()
+                self._index = EntityIndex()
+            else:
+                for grouping_id in groupings:
+                    self._groupings.pop(grouping_id, None)
+            # Any grouping change can affect any of its members.
+            self._users.clear()
+
+    def _grouping_masks(self, grouping_id, index, generation):
+        entry = self._groupings.get(grouping_id)
+        if entry is not None and entry[1] is index:
+            return entry[0]
+        masks = dict.fromkeys(ACTIONS, 0)
+        for entity_id, permissions in self.resolver.grouping_permissions(grouping_id).items():
+            bit = 1 << index.bit(entity_id)
+            for action in ACTIONS:
+                if permissions.get(action):
+                    masks[action] |= bit
+        with self._lock:
+            # Skip caching masks compiled while a change was being applied.
+            if generation == self._generation:
+                self._groupings[grouping_id] = (masks, index)
+        return masks
+
+    def _user_masks(self, user_id):
+        # Reading memberships first lets the resolver apply pending changes,
+        # which clears stale compiled masks before they are used.
+        grouping_ids = self.resolver.groupings_of(user_id)
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                self._users.move_to_end(user_id)
+                return entry
+            index = self._index
+            generation = self._generation
+        masks = dict.fromkeys(ACTIONS, 0)
+        for grouping_id in grouping_ids:
+            for name, mask in self._grouping_masks(grouping_id, index, generation).items():
+                masks[name] |= mask
+        entry = (masks, index)
+        with self._lock:
+            if generation == self._generation:
+                self._users[user_id] = entry
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+        return entry
+
+    def user_mask(self, user_id, action):
+        """
+        Return the bitset of entities `user_id` may perform `action` on, and
+        the `EntityIndex` mapping its bits to entity ids.
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Unsupported action '{action}', expected one of {ACTIONS}")
+        masks, index = self._user_masks(user_id)
+        return masks[action], index
+
+    def check(self, user_id, entity_id, action):
+        return self.check_many(user_id, [entity_id], action)[entity_id]
+
+    def check_many(self, user_id, entity_ids, action):
+        """Return a dict mapping each entity id to whether `action` is allowed."""
+        mask, index = self.user_mask(user_id, action)
+        bits = index.bits
+        result = {}
+        for entity_id in entity_ids:
+            bit = bits.get(entity_id)
+            result[entity_id] = bit is not None and bool(mask >> bit & 1)
+        return result
+
+    def allowed_entities(self, user_id, action):
+        """Return the sorted ids of every entity the user may perform `action` on."""
+        mask, index = self.user_mask(user_id, action)
+        return sorted(index.entities[bit] for bit in iter_bits(mask))
@@ -0,0 +1,200 @@
+# Effective-permission resolution over the Grouping hierarchy
+import threading
+import time
+from sqlalchemy import func, select
+from auth.models.auth_models import GroupingClosure, PermissionChange, Permissions, UserGrouping
+
+
+class PermissionResolver:
+    """
+    Answers "can user U do X on entity E" from an in-process snapshot.
+
+    For every grouping the snapshot holds its permissions on each entity after
+    merging `permission_json` down its ancestor path, the nearest grouping
+    winning per key, so a child grouping can override what it inherits. A
+    user holds a right if any of their groupings grants it. Checks never
+    touch the database.
+
+    The snapshot is loaded through the closure table and then kept current
+    incrementally from the `PermissionChange` log: only groupings below a
+    changed one and users whose memberships changed are reloaded.
+    """
+
+    def __init__(self, helper, sync_interval=None, full_refresh_interval=300.0):
+        """
+        Args:
+            helper: RDBMSHelper on the auth database.
+            sync_interval (float): Seconds between checks of the change log.
+                0 checks before every call; None only after `expire`.
+            full_refresh_interval (float): Seconds after which the snapshot is
+                rebuilt from scratch, as a safety net for log entries that
+                commit out of id order. None disables it.
+        """
+        self.helper = helper
+        self.sync_interval = sync_interval
+        self.full_refresh_interval = full_refresh_interval
+        self.version = None
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._sync_lock = threading.RLock()
+        self._effective = {}
+        self._memberships = {}
+        self._loaded_at = None
+        self._synced_at = None
+
+    def _load_effective(self, session, grouping_ids=None):
+        stmt = (
+            select(GroupingClosure.descendant_id, Permissions.entity_id, Permissions.permission_json)
+            .join(Permissions, Permissions.grouping_id == GroupingClosure.ancestor_id)
+            .order_by(GroupingClosure.depth.desc())
+        )
+        if grouping_ids is not None:
+            stmt = stmt.where(GroupingClosure.descendant_id.in_(grouping_ids))
+        effective = {}
+        for grouping_id, entity_id, permission_json in session.execute(stmt):
+            effective.setdefault(grouping_id, {}).setdefault(entity_id, {}).update(permission_json or {})
+        return effective
+
+    def _load_memberships(self, session, user_ids=None):
+        stmt = select(UserGrouping.user_id, UserGrouping.grouping_id)
+        if user_ids is not None:
+            stmt = stmt.where(UserGrouping.user_id.in_(user_ids))
+        memberships = {}
+        for user_id, grouping_id in session.execute(stmt):
+            memberships.setdefault(user_id, set()).add(grouping_id)
+        return memberships
+
+    def refresh(self):
+        """Reload every grouping's effective permissions and every user's memberships."""
+        with self._sync_lock:
+            self._refresh()
+
+    def _refresh(self):
+        with self.helper.get_session() as session:
+            version = session.scalar(select(func.max(PermissionChange.id))) or 0
+            effective = self._load_effective(session)
+            memberships = self._load_memberships(session)
+        with self._lock:
+            self._effective = effective
+            self._memberships = memberships
+            self.version = version
+            self._loaded_at = self._synced_at = time.monotonic()
+        self._notify(None, None)
+
+    def sync(self):
+        """
+        Apply change-log entries newer than the snapshot's version.
+
+        Returns:
+            bool: True if anything changed.
+        """
+        with self._sync_lock:
+            return self._sync()
+
+    def _sync(self):
+        if self._loaded_at is None:
+            self._refresh()
+            return True
+        with self.helper.get_session() as session:
+            changes = session.execute(
+                select(PermissionChange.id, PermissionChange.grouping_id, PermissionChange.user_id)
+                .where(PermissionChange.id > self.version)
+            ).all()
+            if not changes:
+                self._synced_at = time.monotonic()
+                return False
+            if any(grouping_id is None and user_id is None for _, grouping_id, user_id in changes):
+                full = True
+            else:
+                full = False
+                changed_groupings = {grouping_id for _, grouping_id, _ in changes if grouping_id is not None}
+                changed_users = {user_id for _, _, user_id in changes if user_id is not None}
+                affected = set(changed_groupings)
+                if changed_groupings:
+                    affected.update(session.scalars(
+                        select(GroupingClosure.descendant_id).where(GroupingClosure.ancestor_id.in_(changed_groupings))
+                    ))
+                effective = self._load_effective(session, affected) if affected else {}
+                memberships = self._load_memberships(session, changed_users) if changed_users else {}
+        if full:
+            self._refresh()
+            return True
+        with self._lock:
+            self._effective = {
+                **{key: value for key, value in self._effective.items() if key not in affected},
+                **effective,
+            }
+            self._memberships = {
+                **{key: value for key, value in self._memberships.items() if key not in changed_users},
+                **memberships,
+            }
+            self.version = max(change_id for change_id, _, _ in changes)
+            self._synced_at = time.monotonic()
+        self._notify(affected, changed_users)
+        return True
+
+    def _notify(self, groupings, users):
+        # None means everything changed.
+        for listener in self.listeners:
+            listener(groupings, users)
+
+    def expire(self):
+        """Check the change log before the next lookup."""
+        self._synced_at = None
+
+    def invalidate(self):
+        """Force a full reload before the next lookup."""
+        self._loaded_at = None
+
+    def _due(self, now):
+        if self._loaded_at is None or self._synced_at is None:
+            return True
+        if self._full_refresh_due(now):
+            return True
+        return self.sync_interval is not None and now - self._synced_at >= self.sync_interval
+
+    def _full_refresh_due(self, now):
+        return (
+            self.full_refresh_interval is not None
+            and self._loaded_at is not None
+            and now - self._loaded_at >= self.full_refresh_interval
+        )
+
+    def _snapshot(self):
+        if self._due(time.monotonic()):
+            with self._sync_lock:
+                now = time.monotonic()
+                if self._full_refresh_due(now):
+                    self._refresh()
+                elif self._due(now):
+                    self._sync()
+        return self._effective, self._memberships
+
+    def groupings_of(self, user_id):
+        """Return the ids of the groupings a user belongs to."""
+        _, memberships = self._snapshot()
+        return set(memberships.get(user_id, ()))
+
+    def grouping_permissions(self, grouping_id, entity_id=None):
+        """Return the merged permissions of one grouping on an entity, or on every entity."""
+        effective, _ = self._snapshot()
+        if entity_id is None:
+            return {key: dict(value) for key, value in effective.get(grouping_id, {}).items()}
+        return dict(effective.get(grouping_id, {}).get(entity_id, {}))
+
+    def effective_permissions(self, user_id, entity_id):
+        """Return the user's permissions on an entity, combined over all their groupings."""
+        effective, memberships = self._snapshot()
+        merged = {}
+        for grouping_id in memberships.get(user_id, ()):
+            for action, allowed in effective.get(grouping_id, {}).get(entity_id, {}).items():
+                merged[action] = merged.get(action) or allowed
+        return merged
+
+    def can(self, user_id, action, entity_id):
+        """Return True if any of the user's groupings grants `action` on the entity."""
+        effective, memberships = self._snapshot()
+        for grouping_id in memberships.get(user_id, ()):
+            if effective.get(grouping_id, {}).get(entity_id, {}).get(action):
+                return True
+        return False
@@ -1,5 +1,5 @@
 # Models for the Auth Module
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, JSON, TIMESTAMP
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, JSON, TIMESTAMP, UniqueConstraint, delete, event, insert, inspect, select
 from sqlalchemy.orm import relationship
 from sources.rdbms.models.models import Base
 
@@ -15,8 +15,24 @@ class Grouping(Base):
     # Self-referencing relationship
     children = relationship("Grouping", backref="parent", remote_side=[id])
 
+class GroupingClosure(Base):
+    """
+    Materialized ancestor/descendant pairs of the Grouping tree.
+
+    Every grouping is its own ancestor at depth 0. Rows are maintained by the
+    mapper events below whenever groupings are inserted, re-parented or
+    deleted through the ORM; call `rebuild_grouping_closure` after bulk
+    changes that bypass it.
+    """
+    __tablename__ = "grouping_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("grouping.id", ondelete="CASCADE"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("grouping.id", ondelete="CASCADE"), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False)
+
 class UserGrouping(Base):
     __tablename__ = "user_grouping"
+    __table_args__ = (UniqueConstraint("user_id", "grouping_id"),)
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, nullable=False)
@@ -31,8 +47,141 @@ class Entity(Base):
 
 class Permissions(Base):
     __tablename__ = "permissions"
+    __table_args__ = (UniqueConstraint("grouping_id", "entity_id"),)
 
     id = Column(Integer, primary_key=True)
     grouping_id = Column(Integer, ForeignKey("grouping.id", ondelete="CASCADE"), nullable=False)
     entity_id = Column(Integer, ForeignKey("entity.id", ondelete="CASCADE"), nullable=False)
     permission_json = Column(JSON, nullable=False)
+
+class PermissionChange(Base):
+    """
+    Append-only log of authorization changes.
+
+    Each row names a grouping whose permissions or position changed and/or a
+    user whose memberships changed; a row with neither asks readers for a
+    full reload. The highest id is the current permission version.
+    """
+    __tablename__ = "permission_change"
+
+    id = Column(Integer, primary_key=True)
+    grouping_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=True)
+
+
+# Closure maintenance
+closure = GroupingClosure.__table__
+
+
+def _subtree(connection, grouping_id):
+    return connection.execute(
+        select(closure.c.descendant_id, closure.c.depth).where(closure.c.ancestor_id == grouping_id)
+    ).all()
+
+
+def _attach(connection, grouping_id, parent_id):
+    """Link the subtree rooted at `grouping_id` under every ancestor of `parent_id`."""
+    subtree = _subtree(connection, grouping_id)
+    if any(descendant_id == parent_id for descendant_id, _ in subtree):
+        raise ValueError(f"Grouping {parent_id} is inside the subtree of grouping {grouping_id}")
+    ancestors = connection.execute(
+        select(closure.c.ancestor_id, closure.c.depth).where(closure.c.descendant_id == parent_id)
+    ).all()
+    rows = [
+        {"ancestor_id": ancestor_id, "descendant_id": descendant_id, "depth": up + down + 1}
+        for ancestor_id, up in ancestors
+        for descendant_id, down in subtree
+    ]
+    if rows:
+        connection.execute(insert(closure), rows)
+
+
+@event.listens_for(Grouping, "after_insert")
+def _grouping_inserted(mapper, connection, target):
+    connection.execute(insert(closure), {"ancestor_id": target.id, "descendant_id": target.id, "depth": 0})
+    if target.parent_id is not None:
+        _attach(connection, target.id, target.parent_id)
+
+
+@event.listens_for(Grouping, "after_update")
+def _grouping_updated(mapper, connection, target):
+    if not inspect(target).attrs.parent_id.history.has_changes():
+        return
+    record_permission_change(connection, grouping_ids=[target.id])
+    subtree_ids = [descendant_id for descendant_id, _ in _subtree(connection, target.id)]
+    if target.parent_id in subtree_ids:
+        raise ValueError(f"Grouping {target.parent_id} is inside the subtree of grouping {target.id}")
+    connection.execute(
+        delete(closure)
+        .where(closure.c.descendant_id.in_(subtree_ids))
+        .where(closure.c.ancestor_id.not_in(subtree_ids))
+    )
+    if target.parent_id is not None:
+        _attach(connection, target.id, target.parent_id)
+
+
+@event.listens_for(Grouping, "after_delete")
+def _grouping_deleted(mapper, connection, target):
+    subtree_ids = [descendant_id for descendant_id, _ in _subtree(connection, target.id)] or [target.id]
+    connection.execute(delete(closure).where(closure.c.descendant_id.in_(subtree_ids)))
+    # Memberships and permissions of the subtree may be cascaded away by the
+    # database without ORM events, so readers reload everything.
+    record_permission_change(connection, full=True)
+
+
+def rebuild_grouping_closure(connection):
+    """
+    Recompute the whole closure table from `Grouping.parent_id`.
+
+    Returns:
+        int: Number of closure rows written.
+    """
+    parents = dict(connection.execute(select(Grouping.__table__.c.id, Grouping.__table__.c.parent_id)).all())
+    rows = []
+    for grouping_id in parents:
+        ancestor_id, depth, seen = grouping_id, 0, set()
+        while ancestor_id is not None and ancestor_id not in seen:
+            seen.add(ancestor_id)
+            rows.append({"ancestor_id": ancestor_id, "descendant_id": grouping_id, "depth": depth})
+            ancestor_id, depth = parents.get(ancestor_id), depth + 1
+    connection.execute(delete(closure))
+    if rows:
+        connection.execute(insert(closure), rows)
+    return len(rows)
+
+
+# Change log maintenance
+def record_permission_change(connection, grouping_ids=(), user_ids=(), full=False):
+    """
+    Append entries to the permission change log.
+
+    Call this from writes that bypass the ORM (e.g. Core bulk upserts); ORM
+    changes to Permissions, UserGrouping and Grouping are logged by the
+    mapper events below.
+    """
+    rows = [{"grouping_id": grouping_id, "user_id": None} for grouping_id in set(grouping_ids)]
+    rows += [{"grouping_id": None, "user_id": user_id} for user_id in set(user_ids)]
+    if full:
+        rows.append({"grouping_id": None, "user_id": None})
+    if rows:
+        connection.execute(insert(PermissionChange.__table__), rows)
+
+
+def _changed_values(target, attribute):
+    history = inspect(target).attrs[attribute].history
+    values = {getattr(target, attribute)} | set(history.deleted or ())
+    return [value for value in values if value is not None]
+
+
+@event.listens_for(Permissions, "after_insert")
+@event.listens_for(Permissions, "after_update")
+@event.listens_for(Permissions, "after_delete")
+def _permissions_changed(mapper, connection, target):
+    record_permission_change(connection, grouping_ids=_changed_values(target, "grouping_id"))
+
+
+@event.listens_for(UserGrouping, "after_insert")
+@event.listens_for(UserGrouping, "after_update")
+@event.listens_for(UserGrouping, "after_delete")
+def _membership_changed(mapper, connection, target):
+    record_permission_change(connection, user_ids=_changed_values(target, "user_id"))
@@ -1,17 +1,173 @@
 # Core business logic for Auth Module
+from sqlalchemy import select
+from sources.rdbms.helpers.dialect_helper import build_upsert, key_in, max_bind_params, max_in_list_size
+from sources.rdbms.helpers.query_helper import batched
 from sources.rdbms.helpers.rdbms_helper import RDBMSHelper
-from auth.models.auth_models import Grouping, UserGrouping, Entity, Permissions
+from auth.helpers.permission_matrix import PermissionMatrix
+from auth.helpers.permission_resolver import PermissionResolver
+from auth.models.auth_models import (
+    Grouping,
+    UserGrouping,
+    Entity,
+    Permissions,
+    record_permission_change,
+)
 
 class AuthService:
-    def __init__(self, db_url):
-        self.helper = RDBMSHelper(db_url)
+    def __init__(self, db_url, permission_sync_interval=1.0, **engine_options):
+        """
+        Args:
+            db_url: Database connection string.
+            permission_sync_interval (float): Seconds between checks of the
+                permission change log by the in-process permission snapshot;
+                see `PermissionResolver`.
+            **engine_options: Pool and engine options, see RDBMSHelper.
+        """
+        self.helper = RDBMSHelper(db_url, **engine_options)
+        self.resolver = PermissionResolver(self.helper, sync_interval=permission_sync_interval)
+        self.matrix = PermissionMatrix(self.resolver)
+
+    def create_grouping(self, name, parent_id=None):
+        """Create a grouping, optionally under a parent, and return its id."""
+        with self.helper.get_session() as session:
+            grouping = Grouping(name=name, parent_id=parent_id)
+            session.add(grouping)
+            session.flush()
+            grouping_id = grouping.id
+        self.resolver.expire()
+        return grouping_id
+
+    def move_grouping(self, grouping_id, parent_id):
+        """Re-parent a grouping (None makes it a root); its subtree moves with it."""
+        with self.helper.get_session() as session:
+            grouping = session.get(Grouping, grouping_id)
+            if grouping is None:
+                raise ValueError(f"Grouping with id {grouping_id} not found")
+            grouping.parent_id = parent_id
+        self.resolver.expire()
+
+    def add_user_to_grouping(self, user_id, grouping_id):
+        """Make a user a member of a grouping."""
+        with self.helper.get_session() as session:
+            session.add(UserGrouping(user_id=user_id, grouping_id=grouping_id))
+        self.resolver.expire()
 
     def assign_permission(self, group_id, entity_id, permissions):
-        """Assign permissions to a group on a specific entity."""
+        """Assign permissions to a group on a specific entity, replacing any already assigned."""
+        self.assign_permissions_bulk([(group_id, entity_id, permissions)])
+
+    def get_permissions(self, group_id, entity_id):
+        """Return the permissions assigned directly to a group on an entity, or None."""
+        with self.helper.get_session() as session:
+            return session.scalar(
+                select(Permissions.permission_json)
+                .where(Permissions.grouping_id == group_id, Permissions.entity_id == entity_id)
+            )
+
+    def _upsert(self, session, model, keys, rows, batch_size):
+        # Splits rows into inserted / updated / unchanged against what is
+        # stored, then upserts only the inserted and updated ones.
+        dialect = session.get_bind().dialect
+        table = model.__table__
+        batch_size = max(1, min(batch_size, max_in_list_size(dialect), max_bind_params(dialect) // len(keys)))
+        values = [column for column in rows[0] if column not in keys] if rows else []
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        changed = []
+        for batch in batched(rows, batch_size):
+            stmt = select(*(table.c[column] for column in keys + values)).where(key_in(
+                dialect, [table.c[column] for column in keys],
+                list({tuple(row[column] for column in keys) for row in batch}),
+            ))
+            stored = {tuple(row[:len(keys)]): tuple(row[len(keys):]) for row in session.execute(stmt)}
+            pending = []
+            for row in batch:
+                current = stored.get(tuple(row[column] for column in keys))
+                if current is None:
+                    counts["inserted"] += 1
+                elif current != tuple(row[column] for column in values):
+                    counts["updated"] += 1
+                else:
+                    counts["unchanged"] += 1
+                    continue
+                pending.append(row)
+            per_statement = max(1, max_bind_params(dialect) // len(keys + values))
+            for chunk in batched(pending, per_statement):
+                session.execute(build_upsert(dialect, table, chunk, keys, values))
+            changed.extend(pending)
+        return counts, changed
+
+    def assign_permissions_bulk(self, permissions, batch_size=500):
+        """
+        Upsert many permission assignments in one transaction.
+
+        Rows are keyed on (grouping_id, entity_id); an existing assignment is
+        replaced only if its `permission_json` differs. Repeated keys in the
+        input collapse to the last one. Stored rows are read and written in
+        batches of `batch_size`, so a tenant's whole grouping x entity grid is
+        provisioned in a few statements.
+
+        Args:
+            permissions: Iterable of (grouping_id, entity_id, permission_json).
+            batch_size (int): Keys looked up and upserted per statement.
+
+        Returns:
+            dict: Counts of "inserted", "updated" and "unchanged" assignments.
+        """
+        rows = {
+            (grouping_id, entity_id): {
+                "grouping_id": grouping_id, "entity_id": entity_id, "permission_json": permission_json,
+            }
+            for grouping_id, entity_id, permission_json in permissions
+        }
         with self.helper.get_session() as session:
-            permission = Permissions(
-                grouping_id=group_id,
-                entity_id=entity_id,
-                permission_json=permissions
+            counts, changed = self._upsert(
+                session, Permissions, ["grouping_id", "entity_id"], list(rows.values()), batch_size
             )
-            session.add(permission)
+            # Core upserts bypass the mapper events that log changes.
+            record_permission_change(session.connection(), grouping_ids={row["grouping_id"] for row in changed})
+        self.resolver.expire()
+        return counts
+
+    def add_users_to_groupings_bulk(self, memberships, batch_size=500):
+        """
+        Add many users to groupings in one transaction, skipping existing memberships.
+
+        Args:
+            memberships: Iterable of (user_id, grouping_id).
+            batch_size (int): Keys looked up and inserted per statement.
+
+        Returns:
+            dict: Counts of "inserted" and "unchanged" memberships.
+        """
+        rows = [{"user_id": user_id, "grouping_id": grouping_id} for user_id, grouping_id in set(memberships)]
+        with self.helper.get_session() as session:
+            counts, changed = self._upsert(session, UserGrouping, ["user_id", "grouping_id"], rows, batch_size)
+            record_permission_change(session.connection(), user_ids={row["user_id"] for row in changed})
+        self.resolver.expire()
+        return {"inserted": counts["inserted"], "unchanged": counts["unchanged"]}
+
+    def effective_permissions(self, user_id, entity_id):
+        """Return a user's permissions on an entity, inherited through the grouping tree."""
+        return self.resolver.effective_permissions(user_id, entity_id)
+
+    def can(self, user_id, action, entity_id):
+        """Check whether a user may perform `action` (e.g. "read") on an entity."""
+        return self.resolver.can(user_id, action, entity_id)
+
+    def check_many(self, user_id, entity_ids, action):
+        """
+        Check one action on many entities at once.
+
+        Args:
+            user_id: User to check.
+            entity_ids: Iterable of entity ids.
+            action (str): "create", "read", "update" or "delete".
+
+        Returns:
+            dict: Entity id to True/False.
+        """
+        return self.matrix.check_many(user_id, entity_ids, action)
+
+    def allowed_entities(self, user_id, action):
+        """Return the sorted ids of all entities the user may perform `action` on."""
+        return self.matrix.allowed_entities(user_id, action)
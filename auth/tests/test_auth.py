@@ -1,5 +1,17 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
 import unittest
+from unittest import mock
+import jwt
+from auth.helpers import password_helper
+from auth.helpers.auth_helper import AuthHelper, TokenCache
+from auth.models.auth_models import Entity, GroupingClosure, Permissions, rebuild_grouping_closure
 from auth.services.auth_service import AuthService
+from sources.rdbms.helpers.engine_registry import registry
+from sources.rdbms.models.models import Base
 from sources.tests.test_config import TEST_ENV_CONFIG
 
 
@@ -47,5 +59,259 @@ class TestAuthService(unittest.TestCase):
         self.assertEqual(result, permissions, "Permissions assigned do not match the expected values")
 
 
+
+class SQLiteAuthTestCase(unittest.TestCase):
+    """Runs AuthService against a throwaway SQLite database."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.auth_service = AuthService(f"sqlite:///{os.path.join(self.tmpdir.name, 'auth.db')}")
+        Base.metadata.create_all(self.auth_service.helper.engine)
+        with self.auth_service.helper.get_session() as session:
+            session.add_all([Entity(id=i, source="postgres", name=f"table_{i}") for i in range(1, 6)])
+
+    def tearDown(self):
+        registry.dispose(self.auth_service.helper.engine)
+        self.tmpdir.cleanup()
+
+    def closure_rows(self):
+        with self.auth_service.helper.get_session() as session:
+            return sorted(
+                (row.ancestor_id, row.descendant_id, row.depth)
+                for row in session.query(GroupingClosure).all()
+            )
+
+
+class TestPermissionResolver(SQLiteAuthTestCase):
+    def test_closure_tracks_inserts_and_moves(self):
+        root = self.auth_service.create_grouping("root")
+        team = self.auth_service.create_grouping("team", root)
+        squad = self.auth_service.create_grouping("squad", team)
+        other = self.auth_service.create_grouping("other")
+        self.assertIn((root, squad, 2), self.closure_rows())
+
+        self.auth_service.move_grouping(team, other)
+        rows = self.closure_rows()
+        self.assertNotIn((root, squad, 2), rows)
+        self.assertIn((other, squad, 2), rows)
+        with self.assertRaises(ValueError):
+            self.auth_service.move_grouping(other, squad)
+
+        with self.auth_service.helper.get_session() as session:
+            rebuild_grouping_closure(session.connection())
+        self.assertEqual(self.closure_rows(), rows)
+
+    def test_nearest_grouping_wins_and_memberships_combine(self):
+        root = self.auth_service.create_grouping("root")
+        team = self.auth_service.create_grouping("team", root)
+        auditors = self.auth_service.create_grouping("auditors")
+        self.auth_service.assign_permission(root, 1, {"read": True, "update": True})
+        self.auth_service.assign_permission(team, 1, {"update": False})
+        self.auth_service.assign_permission(auditors, 2, {"read": True})
+        self.auth_service.add_user_to_grouping(7, team)
+
+        self.assertTrue(self.auth_service.can(7, "read", 1))
+        self.assertFalse(self.auth_service.can(7, "update", 1))
+        self.assertFalse(self.auth_service.can(7, "read", 2))
+
+        self.auth_service.add_user_to_grouping(7, auditors)
+        self.assertTrue(self.auth_service.can(7, "read", 2))
+        self.assertEqual(self.auth_service.effective_permissions(7, 1), {"read": True, "update": False})
+        self.assertFalse(self.auth_service.can(8, "read", 1))
+
+
+class TestPermissionMatrix(SQLiteAuthTestCase):
+    def test_check_many_and_allowed_entities(self):
+        root = self.auth_service.create_grouping("root")
+        team = self.auth_service.create_grouping("team", root)
+        self.auth_service.assign_permission(root, 1, {"read": True})
+        self.auth_service.assign_permission(root, 3, {"read": True, "delete": True})
+        self.auth_service.assign_permission(team, 3, {"read": False})
+        self.auth_service.add_user_to_grouping(7, team)
+
+        self.assertEqual(self.auth_service.check_many(7, [1, 2, 3], "read"), {1: True, 2: False, 3: False})
+        self.assertEqual(self.auth_service.allowed_entities(7, "delete"), [3])
+        self.assertEqual(self.auth_service.allowed_entities(8, "read"), [])
+        with self.assertRaises(ValueError):
+            self.auth_service.check_many(7, [1], "execute")
+
+    def test_bits_are_dense_and_user_masks_bounded(self):
+        team = self.auth_service.create_grouping("team")
+        self.auth_service.assign_permissions_bulk(
+            [(team, 10_000_000, {"read": True}), (team, -5, {"read": True}), (team, 3, {"read": False})]
+        )
+        for user_id in range(1, 4):
+            self.auth_service.add_user_to_grouping(user_id, team)
+        self.auth_service.matrix.max_users = 2
+
+        self.assertEqual(self.auth_service.allowed_entities(1, "read"), [-5, 10_000_000])
+        self.assertEqual(
+            self.auth_service.check_many(2, [10_000_000, 3, 42], "read"), {10_000_000: True, 3: False, 42: False}
+        )
+        mask, _ = self.auth_service.matrix.user_mask(3, "read")
+        self.assertLess(mask.bit_length(), 8)
+        self.assertEqual(len(self.auth_service.matrix._users), 2)
+
+    def test_changes_are_applied_incrementally(self):
+        root = self.auth_service.create_grouping("root")
+        team = self.auth_service.create_grouping("team")
+        self.auth_service.assign_permission(root, 2, {"update": True})
+        self.auth_service.add_user_to_grouping(7, team)
+        self.assertEqual(self.auth_service.allowed_entities(7, "update"), [])
+        version = self.auth_service.resolver.version
+
+        self.auth_service.move_grouping(team, root)
+        self.assertEqual(self.auth_service.allowed_entities(7, "update"), [2])
+        self.assertGreater(self.auth_service.resolver.version, version)
+
+        self.auth_service.assign_permission(team, 4, {"update": True})
+        self.auth_service.add_user_to_grouping(8, root)
+        self.assertEqual(self.auth_service.allowed_entities(7, "update"), [2, 4])
+        self.assertEqual(self.auth_service.allowed_entities(8, "update"), [2])
+
+
+class TestBulkProvisioning(SQLiteAuthTestCase):
+    def test_assign_permissions_bulk_is_idempotent(self):
+        groupings = [self.auth_service.create_grouping(f"g{i}") for i in range(3)]
+        grid = [(grouping, entity, {"read": True}) for grouping in groupings for entity in range(1, 6)]
+        self.assertEqual(
+            self.auth_service.assign_permissions_bulk(grid, batch_size=4),
+            {"inserted": 15, "updated": 0, "unchanged": 0},
+        )
+        grid[0] = (groupings[0], 1, {"read": True, "update": True})
+        self.assertEqual(
+            self.auth_service.assign_permissions_bulk(grid, batch_size=4),
+            {"inserted": 0, "updated": 1, "unchanged": 14},
+        )
+        self.auth_service.assign_permission(groupings[1], 2, {"read": False})
+        with self.auth_service.helper.get_session() as session:
+            self.assertEqual(session.query(Permissions).count(), 15)
+        self.assertEqual(self.auth_service.get_permissions(groupings[0], 1), {"read": True, "update": True})
+        self.assertEqual(self.auth_service.get_permissions(groupings[1], 2), {"read": False})
+
+        self.auth_service.add_user_to_grouping(7, groupings[0])
+        self.assertEqual(self.auth_service.allowed_entities(7, "update"), [1])
+
+    def test_add_users_to_groupings_bulk(self):
+        team = self.auth_service.create_grouping("team")
+        self.auth_service.assign_permission(team, 3, {"read": True})
+        self.auth_service.add_user_to_grouping(1, team)
+        self.assertEqual(
+            self.auth_service.add_users_to_groupings_bulk([(user, team) for user in range(1, 5)], batch_size=2),
+            {"inserted": 3, "unchanged": 1},
+        )
+        self.assertEqual(self.auth_service.check_many(4, [3], "read"), {3: True})
+
+
+class TestVerifyToken(unittest.TestCase):
+    def setUp(self):
+        self.saved = (dict(AuthHelper.KEYS), AuthHelper.ACTIVE_KID, AuthHelper.token_cache)
+        self.now = time.time()
+        AuthHelper.token_cache = TokenCache(capacity=2, clock=lambda: self.now)
+
+    def tearDown(self):
+        keys, AuthHelper.ACTIVE_KID, AuthHelper.token_cache = self.saved
+        AuthHelper.KEYS.clear()
+        AuthHelper.KEYS.update(keys)
+
+    def test_claims_are_checked_and_cached_until_expiry(self):
+        token = AuthHelper.generate_token({"sub": "7", "aud": "api", "exp": int(self.now) + 60})
+        with mock.patch("auth.helpers.auth_helper.jwt.decode", wraps=jwt.decode) as decode:
+            self.assertEqual(AuthHelper.verify_token(token, audience="api")["sub"], "7")
+            AuthHelper.verify_token(token, audience="api")
+            self.assertEqual(decode.call_count, 1)
+            with self.assertRaises(jwt.InvalidAudienceError):
+                AuthHelper.verify_token(token, audience="admin")
+
+            # Past `exp` on the cache's clock: served only to callers whose
+            # own leeway still covers it, re-verified for everyone else.
+            self.now += 120
+            AuthHelper.verify_token(token, audience="api", leeway=300)
+            self.assertEqual(decode.call_count, 2)
+            AuthHelper.verify_token(token, audience="api")
+            self.assertEqual(decode.call_count, 3)
+
+        with self.assertRaises(jwt.ExpiredSignatureError):
+            AuthHelper.verify_token(AuthHelper.generate_token({"exp": int(time.time()) - 60}))
+        with self.assertRaises(jwt.ImmatureSignatureError):
+            AuthHelper.verify_token(AuthHelper.generate_token({"nbf": int(time.time()) + 60}))
+        with self.assertRaises(jwt.InvalidSignatureError):
+            AuthHelper.verify_token(jwt.encode({"sub": "7"}, "another_secret", algorithm="HS256"))
+
+    def test_retiring_a_key_invalidates_its_tokens(self):
+        AuthHelper.add_key("k1", "first_secret")
+        old = AuthHelper.generate_token({"sub": "1"})
+        AuthHelper.add_key("k2", "second_secret")
+        new = AuthHelper.generate_token({"sub": "2"})
+        self.assertEqual(AuthHelper.verify_token(old)["sub"], "1")
+        self.assertEqual(AuthHelper.verify_token(new)["sub"], "2")
+        self.assertEqual(len(AuthHelper.token_cache), 2)
+
+        AuthHelper.retire_key("k1")
+        self.assertEqual(len(AuthHelper.token_cache), 1)
+        with self.assertRaises(jwt.InvalidTokenError):
+            AuthHelper.verify_token(old)
+        self.assertEqual(AuthHelper.verify_token(new)["sub"], "2")
+
+    def test_replacing_a_key_invalidates_its_tokens(self):
+        AuthHelper.add_key("k1", "first_secret")
+        token = AuthHelper.generate_token({"sub": "1"})
+        self.assertEqual(AuthHelper.verify_token(token)["sub"], "1")
+
+        AuthHelper.add_key("k1", "rotated_secret")
+        self.assertEqual(len(AuthHelper.token_cache), 0)
+        with self.assertRaises(jwt.InvalidSignatureError):
+            AuthHelper.verify_token(token)
+
+    def test_legacy_key_can_be_retired(self):
+        legacy = AuthHelper.generate_token({"sub": "1"})
+        self.assertEqual(AuthHelper.verify_token(legacy, audience=None)["sub"], "1")
+        forged = jwt.encode({"sub": "admin"}, AuthHelper.SECRET_KEY, algorithm="HS256")
+
+        AuthHelper.add_key("k1", "first_secret")
+        AuthHelper.retire_key(AuthHelper.LEGACY_KID)
+        for token in (legacy, forged):
+            with self.assertRaises(jwt.InvalidTokenError):
+                AuthHelper.verify_token(token)
+        self.assertEqual(AuthHelper.verify_token(AuthHelper.generate_token({"sub": "2"}))["sub"], "2")
+
+
+class TestPasswordHashing(unittest.TestCase):
+    FAST_SCRYPT = {"n": 2 ** 10, "r": 8, "p": 1}
+
+    def test_hash_verify_and_rehash(self):
+        encoded = password_helper.hash_password("s3cret", params=self.FAST_SCRYPT)
+        self.assertTrue(encoded.startswith("scrypt$n=1024,r=8,p=1$"))
+        self.assertNotEqual(encoded, password_helper.hash_password("s3cret", params=self.FAST_SCRYPT))
+        self.assertTrue(password_helper.verify_password("s3cret", encoded))
+        self.assertFalse(password_helper.verify_password("wrong", encoded))
+        self.assertFalse(password_helper.needs_rehash(encoded, params=self.FAST_SCRYPT))
+        self.assertTrue(password_helper.needs_rehash(encoded))
+
+        legacy = hashlib.sha256(b"s3cret").hexdigest()
+        self.assertTrue(AuthHelper.verify_password("s3cret", legacy))
+        self.assertTrue(asyncio.run(AuthHelper.verify_password_async("s3cret", legacy)))
+        self.assertTrue(AuthHelper.needs_rehash(legacy))
+        with self.assertRaises(ValueError):
+            password_helper.verify_password("s3cret", "not-a-hash")
+
+    def test_pooled_hasher_upgrades_on_login(self):
+        hasher = password_helper.PasswordHasher(
+            "pbkdf2_sha256", params={"iterations": 1000}, max_workers=2
+        )
+        self.addCleanup(hasher.close)
+        old = password_helper.hash_password("s3cret", params=self.FAST_SCRYPT)
+
+        matched, upgraded = hasher.verify_and_update("s3cret", old)
+        self.assertTrue(matched)
+        self.assertTrue(upgraded.startswith("pbkdf2_sha256$iterations=1000$"))
+        self.assertEqual(hasher.verify_and_update("s3cret", upgraded), (True, None))
+        self.assertEqual(hasher.verify_and_update("wrong", old), (False, None))
+
+        hashes = hasher.hash_many(["a", "b", "c"])
+        self.assertEqual(hasher.verify_many(zip(["a", "x", "c"], hashes)), [True, False, True])
+        self.assertTrue(asyncio.run(hasher.verify_async("b", hashes[1])))
+
+
 if __name__ == "__main__":
     unittest.main()
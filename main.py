@@ -1,7 +1,8 @@
-import pandas as pd
 from sources.rdbms.sources.postgres_source import PostgresSource
 from sources.rdbms.models.models import Base, User
 from sources.rdbms.helpers.rdbms_helper import RDBMSHelper
+from sources.rdbms.helpers.ingest_helper import ingest_csv
+from sources.rdbms.helpers.export_helper import export_csv
 from sources.tests.test_config import TEST_ENV_CONFIG
 
 # Step 1: Configure DB_URL from test_config.py
@@ -29,16 +30,17 @@ def create_users_from_csv(csv_path):
         csv_path (str): Path to the input CSV file.
     """
     try:
-        df = pd.read_csv(csv_path)
-        for _, row in df.iterrows():
-            user_data = {"id": row["id"], "name": row["name"], "email": row["email"]}
-            existing_user = db_source.read(User, row["id"])
-            if not existing_user:
-                db_source.create(User, user_data)
-                print(f"Inserted: {user_data}")
-            else:
-                print(f"User with ID={row['id']} already exists, skipping.")
-        print("Users successfully created from CSV!")
+        # Existing IDs are skipped by the database (empty update_columns):
+        # each chunk is COPYed into a staging table and merged with
+        # INSERT ... ON CONFLICT DO NOTHING.
+        report = ingest_csv(
+            db_source, User, csv_path, columns=["id", "name", "email"],
+            conflict_keys=["id"], update_columns=[],
+        )
+        print(
+            f"Users successfully created from CSV! Loaded {report['rows']} rows "
+            f"in {report['seconds']:.2f}s ({report['rows_per_sec']:.0f} rows/sec)."
+        )
     except Exception as e:
         print(f"Error creating users from CSV: {e}")
 
@@ -97,11 +99,8 @@ def export_users_to_csv(output_path):
         output_path (str): Path to save the CSV file.
     """
     try:
-        users = db_source.filter(User, {})
-        user_data = [{"id": user.id, "name": user.name, "email": user.email} for user in users]
-        df = pd.DataFrame(user_data)
-        df.to_csv(output_path, index=False)
-        print(f"Users exported to {output_path}")
+        report = export_csv(db_source, User, output_path, columns=["id", "name", "email"])
+        print(f"Users exported to {output_path} ({report['rows']} rows in {report['seconds']:.2f}s)")
     except Exception as e:
         print(f"Error exporting users to CSV: {e}")
 
@@ -0,0 +1,346 @@
+# Dialect-specific statement builders for the RDBMS sources
+import codecs
+import io
+import json
+from sqlalchemy import and_, bindparam, column, or_, select, table as table_clause, text, tuple_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.engine import make_url
+from .query_helper import batched
+
+# Upper bound on bind parameters in a single statement, per dialect.
+MAX_BIND_PARAMS = {
+    "postgresql": 32767,
+    "sqlite": 32766,
+    "mysql": 65535,
+    "mariadb": 65535,
+    "mssql": 2100,
+    "oracle": 65535,
+}
+DEFAULT_MAX_BIND_PARAMS = 999
+
+# Dialects limiting the number of expressions in one IN list.
+MAX_IN_LIST_SIZE = {
+    "oracle": 1000,
+}
+
+# Dialects without row-value `(a, b) IN ((...), ...)` predicates.
+NO_ROW_VALUE_IN = {"mssql"}
+
+# Default asyncio driver per backend, used when a plain URL is given to an async source.
+ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+    "mariadb": "aiomysql",
+    "sqlite": "aiosqlite",
+    "mssql": "aioodbc",
+    "oracle": "oracledb_async",
+}
+
+
+def max_bind_params(dialect):
+    """Return the bind-parameter limit for a dialect, leaving headroom for extra binds."""
+    return MAX_BIND_PARAMS.get(dialect.name, DEFAULT_MAX_BIND_PARAMS) - 10
+
+
+def max_in_list_size(dialect):
+    """Return how many values a single `IN (...)` list may hold on a dialect."""
+    return min(MAX_IN_LIST_SIZE.get(dialect.name, float("inf")), max_bind_params(dialect))
+
+
+def key_in(dialect, columns, keys):
+    """
+    Return a predicate matching rows whose `columns` equal one of `keys`.
+
+    A single column compiles to a plain `IN` list and several to a row-value
+    `(a, b) IN ((...), ...)`, so only the listed key combinations match, not
+    the cross product of each column's values. Dialects without row-value
+    IN get an OR of per-key ANDs instead.
+
+    Args:
+        dialect: SQLAlchemy dialect of the target engine.
+        columns: Column expressions forming the key.
+        keys: Sequence of value tuples, one entry per column.
+    """
+    if len(columns) == 1:
+        return columns[0].in_([key[0] for key in keys])
+    if dialect.name in NO_ROW_VALUE_IN:
+        return or_(*(and_(*(c == value for c, value in zip(columns, key))) for key in keys))
+    return tuple_(*columns).in_(list(keys))
+
+
+def to_async_url(db_url):
+    """
+    Return `db_url` with an asyncio driver.
+
+    URLs that already name an async driver are returned unchanged, so
+    `postgresql://...` becomes `postgresql+asyncpg://...` while
+    `postgresql+asyncpg://...` is kept as is.
+    """
+    url = make_url(db_url)
+    if url.get_dialect().is_async:
+        return url
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver known for backend '{backend}'")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+def build_upsert(dialect, table, rows, conflict_keys, update_columns=None):
+    """
+    Build a single statement that inserts `rows` and resolves key conflicts.
+
+    Compiles to `INSERT ... ON CONFLICT` on PostgreSQL/SQLite,
+    `INSERT ... ON DUPLICATE KEY UPDATE` on MySQL/MariaDB and `MERGE` on
+    Oracle/MSSQL.
+
+    Args:
+        dialect: SQLAlchemy dialect of the target engine.
+        table: Table to upsert into.
+        rows: List of dictionaries sharing the same keys.
+        conflict_keys: Columns identifying an existing row. MySQL resolves
+            conflicts on any unique key, so there they are informational.
+        update_columns: Columns to overwrite on conflict. None updates every
+            non-key column present in the rows; an empty list leaves existing
+            rows untouched.
+
+    Returns:
+        An executable statement.
+    """
+    columns = list(rows[0].keys())
+    if update_columns is None:
+        update_columns = [c for c in columns if c not in conflict_keys]
+    builder = _UPSERT_BUILDERS.get(dialect.name)
+    if builder is None:
+        raise NotImplementedError(f"Upsert is not supported for dialect '{dialect.name}'")
+    return builder(dialect, table, rows, columns, list(conflict_keys), list(update_columns))
+
+
+def build_upsert_batches(dialect, table, rows, conflict_keys, update_columns=None, batch_size=500):
+    """
+    Yield `build_upsert` statements covering `rows`.
+
+    Rows repeating a conflict key within a batch are collapsed, the last one
+    winning, since a single upsert statement may not touch a row twice.
+    Statements are further split to stay within the dialect's bind-parameter
+    limit.
+    """
+    for batch in batched(rows, batch_size):
+        unique = {tuple(row[key] for key in conflict_keys): row for row in batch}
+        batch = list(unique.values())
+        per_statement = max(1, max_bind_params(dialect) // len(batch[0]))
+        for chunk in batched(batch, per_statement):
+            yield build_upsert(dialect, table, chunk, conflict_keys, update_columns)
+
+
+def _on_conflict_upsert(insert_func):
+    def build(dialect, table, rows, columns, conflict_keys, update_columns):
+        stmt = insert_func(table).values(rows)
+        if not update_columns:
+            return stmt.on_conflict_do_nothing(index_elements=conflict_keys)
+        return stmt.on_conflict_do_update(
+            index_elements=conflict_keys,
+            set_={column: stmt.excluded[column] for column in update_columns},
+        )
+    return build
+
+
+def _mysql_upsert(dialect, table, rows, columns, conflict_keys, update_columns):
+    stmt = mysql.insert(table).values(rows)
+    if not update_columns:
+        # Assigning a key to itself is a no-op that still swallows the conflict,
+        # unlike INSERT IGNORE which also hides unrelated errors.
+        key = conflict_keys[0]
+        return stmt.on_duplicate_key_update({key: table.c[key]})
+    return stmt.on_duplicate_key_update({column: stmt.inserted[column] for column in update_columns})
+
+
+def _merge_upsert(dialect, table, rows, columns, conflict_keys, update_columns):
+    quote = dialect.identifier_preparer.quote
+    params = []
+    value_rows = []
+    for i, row in enumerate(rows):
+        names = []
+        for j, column in enumerate(columns):
+            name = f"p{i}_{j}"
+            params.append(bindparam(name, row[column], type_=table.c[column].type))
+            names.append(name)
+        value_rows.append(names)
+
+    quoted = [quote(column) for column in columns]
+    on_clause = " AND ".join(f"target.{quote(k)} = source.{quote(k)}" for k in conflict_keys)
+    insert_clause = (
+        f"WHEN NOT MATCHED THEN INSERT ({', '.join(quoted)}) "
+        f"VALUES ({', '.join(f'source.{c}' for c in quoted)})"
+    )
+    update_clause = ""
+
+    if dialect.name == "oracle":
+        selects = " UNION ALL ".join(
+            "SELECT " + ", ".join(f":{name} AS {col}" for name, col in zip(names, quoted)) + " FROM dual"
+            for names in value_rows
+        )
+        if update_columns:
+            update_clause = "WHEN MATCHED THEN UPDATE SET " + ", ".join(
+                f"target.{quote(c)} = source.{quote(c)}" for c in update_columns
+            ) + " "
+        sql = (
+            f"MERGE INTO {dialect.identifier_preparer.format_table(table)} target "
+            f"USING ({selects}) source ON ({on_clause}) {update_clause}{insert_clause}"
+        )
+    else:
+        values = ", ".join("(" + ", ".join(f":{name}" for name in names) + ")" for names in value_rows)
+        if update_columns:
+            update_clause = "WHEN MATCHED THEN UPDATE SET " + ", ".join(
+                f"{quote(c)} = source.{quote(c)}" for c in update_columns
+            ) + " "
+        sql = (
+            f"MERGE INTO {dialect.identifier_preparer.format_table(table)} WITH (HOLDLOCK) AS target "
+            f"USING (VALUES {values}) AS source ({', '.join(quoted)}) ON {on_clause} "
+            f"{update_clause}{insert_clause};"
+        )
+    return text(sql).bindparams(*params)
+
+
+def supports_copy(dialect):
+    """Return True when rows can be bulk-loaded with PostgreSQL's COPY protocol."""
+    return dialect.name == "postgresql"
+
+
+def _copy_field(value):
+    # CSV format where an unquoted empty field is NULL and strings are always
+    # quoted, so empty strings and NULLs stay distinct.
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value)
+    if isinstance(value, str):
+        return '"' + value.replace('"', '""') + '"'
+    return str(value)
+
+
+def format_copy_rows(rows):
+    """Render row tuples as CSV text accepted by `COPY ... FROM STDIN WITH (FORMAT csv)`."""
+    return "".join(",".join(_copy_field(value) for value in row) + "\n" for row in rows)
+
+
+def last_row_per_key(columns, rows, conflict_keys):
+    """
+    Collapse row tuples repeating a conflict key, keeping the last one.
+
+    A single `ON CONFLICT DO UPDATE` statement may not touch the same row
+    twice, so COPY upserts dedupe like `build_upsert_batches` does.
+    """
+    positions = [list(columns).index(key) for key in conflict_keys]
+    unique = {tuple(row[position] for position in positions): row for row in rows}
+    return list(unique.values())
+
+
+def copy_rows(connection, table, columns, rows, conflict_keys=None, update_columns=None):
+    """
+    Load rows into a PostgreSQL table with `COPY FROM STDIN`.
+
+    Without `conflict_keys` rows are copied straight into the table. With
+    them, rows are copied into a temporary staging table and merged with
+    `INSERT ... SELECT ... ON CONFLICT`, so COPY can still be used for upserts.
+    Rows repeating a conflict key are collapsed first, the last one winning.
+
+    Args:
+        connection: SQLAlchemy `Connection` inside the caller's transaction.
+        table: Target table.
+        columns: Column names, in the order of the values in each row.
+        rows: Sequence of row tuples.
+        conflict_keys: Optional key columns for upsert semantics.
+        update_columns: Columns overwritten on conflict, see `build_upsert`.
+
+    Returns:
+        int: Number of rows copied.
+    """
+    preparer = connection.dialect.identifier_preparer
+    target = preparer.format_table(table)
+    if conflict_keys is not None:
+        rows = last_row_per_key(columns, rows, conflict_keys)
+        staging = f"_copy_{table.name}"
+        connection.exec_driver_sql(
+            f"CREATE TEMP TABLE IF NOT EXISTS {preparer.quote(staging)} "
+            f"(LIKE {target} INCLUDING DEFAULTS) ON COMMIT DROP"
+        )
+        connection.exec_driver_sql(f"TRUNCATE {preparer.quote(staging)}")
+        copy_target = preparer.quote(staging)
+    else:
+        copy_target = target
+
+    quoted = ", ".join(preparer.quote(name) for name in columns)
+    sql = f"COPY {copy_target} ({quoted}) FROM STDIN WITH (FORMAT csv)"
+    buffer = io.StringIO(format_copy_rows(rows))
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            cursor.copy_expert(sql, buffer)
+        else:
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+    if conflict_keys is not None:
+        staged = table_clause(staging, *(column(name) for name in columns))
+        if update_columns is None:
+            update_columns = [name for name in columns if name not in conflict_keys]
+        stmt = postgresql.insert(table).from_select(list(columns), select(*staged.c))
+        if update_columns:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(conflict_keys),
+                set_={name: stmt.excluded[name] for name in update_columns},
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(conflict_keys))
+        connection.execute(stmt)
+    return len(rows)
+
+
+def copy_query_out(connection, stmt, fileobj, header=True):
+    """
+    Stream the result of `stmt` to `fileobj` as CSV with `COPY (...) TO STDOUT`.
+
+    The query is rendered with inline literals because COPY does not accept
+    bind parameters. Rows go straight from the server to the file without
+    being materialised in Python.
+
+    Args:
+        connection: SQLAlchemy `Connection` on a PostgreSQL engine.
+        stmt: SELECT statement to export.
+        fileobj: Text file object to write to.
+        header (bool): Write the column names as the first line.
+
+    Returns:
+        int: Number of rows written.
+    """
+    # A named-paramstyle dialect keeps `%` in literals unescaped, since the
+    # driver does no parameter interpolation on COPY statements.
+    query = stmt.compile(dialect=postgresql.dialect(paramstyle="named"), compile_kwargs={"literal_binds": True})
+    options = "FORMAT csv, HEADER" if header else "FORMAT csv"
+    sql = f"COPY ({query}) TO STDOUT WITH ({options})"
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):
+            cursor.copy_expert(sql, fileobj)
+            return cursor.rowcount
+        # Chunks may end mid-character, so decode them incrementally.
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        with cursor.copy(sql) as copy:
+            for data in copy:
+                fileobj.write(decoder.decode(bytes(data)))
+        fileobj.write(decoder.decode(b"", final=True))
+        return cursor.rowcount
+    finally:
+        cursor.close()
+
+
+_UPSERT_BUILDERS = {
+    "postgresql": _on_conflict_upsert(postgresql.insert),
+    "sqlite": _on_conflict_upsert(sqlite.insert),
+    "mysql": _mysql_upsert,
+    "mariadb": _mysql_upsert,
+    "oracle": _merge_upsert,
+    "mssql": _merge_upsert,
+}
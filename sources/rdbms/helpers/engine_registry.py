@@ -0,0 +1,218 @@
+# Process-wide registry of SQLAlchemy engines, shared by sources and helpers
+import threading
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+
+class PoolStats:
+    """Counters describing how a connection pool is being used."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+
+    def record_wait(self, seconds, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+
+    def record_checkout(self):
+        with self._lock:
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def record_checkin(self):
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+
+    def snapshot(self, pool):
+        """
+        Return the current counters together with the pool's capacity.
+
+        `saturation` is the fraction of the pool's capacity (size plus
+        overflow) currently checked out; it is None for unbounded pools.
+        """
+        size = pool.size() if hasattr(pool, "size") else None
+        max_overflow = getattr(pool, "_max_overflow", 0)
+        capacity = None
+        if size is not None and max_overflow >= 0:
+            capacity = size + max_overflow
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (self.total_wait / self.checkouts * 1000) if self.checkouts else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "pool_size": size,
+                "capacity": capacity,
+                "saturation": (self.checked_out / capacity) if capacity else None,
+            }
+
+
+def _instrumented_pool_class(pool_class, stats):
+    """Subclass `pool_class` so the time spent waiting for a connection is recorded."""
+
+    class InstrumentedPool(pool_class):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except PoolTimeoutError:
+                stats.record_wait(time.perf_counter() - started, timed_out=True)
+                raise
+            stats.record_wait(time.perf_counter() - started)
+            return connection
+
+    InstrumentedPool.__name__ = f"Instrumented{pool_class.__name__}"
+    return InstrumentedPool
+
+
+class EngineRegistry:
+    """
+    Hands out one engine per (URL, options) pair for the whole process.
+
+    Sources and helpers built against the same database therefore share a
+    single connection pool instead of each creating their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._engines = {}
+        self._stats = {}
+
+    def get_engine(self, db_url, warmup=0, **options):
+        """
+        Return the shared engine for `db_url`, creating it on first use.
+
+        Args:
+            db_url: Database connection string or URL.
+            warmup (int): Number of connections to open eagerly when the
+                engine is created, so the first requests do not pay for
+                connection setup.
+            **options: Pool options (`pool_size`, `max_overflow`,
+                `pool_recycle`, `pool_pre_ping`, `pool_timeout`) and any other
+                `create_engine` keyword arguments. Options left as None use
+                SQLAlchemy's defaults.
+
+        Returns:
+            The shared `Engine`.
+        """
+        engine, created = self._get_or_create(db_url, options, create_engine)
+        if created:
+            self._warm_up(engine, warmup)
+        return engine
+
+    def get_async_engine(self, db_url, **options):
+        """
+        Return the shared `AsyncEngine` for `db_url`, creating it on first use.
+
+        Accepts the same pool options as `get_engine`, except `warmup`. The
+        URL must name an async driver (e.g. `postgresql+asyncpg`).
+        """
+        return self._get_or_create(db_url, options, create_async_engine)[0]
+
+    def _get_or_create(self, db_url, options, factory):
+        url = make_url(db_url)
+        options = {name: value for name, value in options.items() if value is not None}
+        key = (url.render_as_string(hide_password=False), repr(sorted(options.items())))
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is not None:
+                return engine, False
+            engine = self._create_engine(url, options, factory)
+            self._engines[key] = engine
+            return engine, True
+
+    def _create_engine(self, url, options, factory):
+        stats = PoolStats()
+        pool_class = options.pop("poolclass", None) or url.get_dialect().get_pool_class(url)
+        engine = factory(url, poolclass=_instrumented_pool_class(pool_class, stats), **options)
+        sync_engine = getattr(engine, "sync_engine", engine)
+        event.listen(sync_engine, "checkout", lambda *args: stats.record_checkout())
+        event.listen(sync_engine, "checkin", lambda *args: stats.record_checkin())
+        self._stats[sync_engine] = stats
+        return engine
+
+    @staticmethod
+    def _warm_up(engine, count):
+        connections = [engine.connect() for _ in range(count)]
+        for connection in connections:
+            connection.close()
+
+    def pool_stats(self, engine):
+        """Return a snapshot of pool usage for an engine created by this registry."""
+        sync_engine = getattr(engine, "sync_engine", engine)
+        stats = self._stats.get(sync_engine)
+        if stats is None:
+            raise ValueError("Engine was not created by this registry")
+        return stats.snapshot(sync_engine.pool)
+
+    def dispose(self, engine):
+        """
+        Close an engine's pooled connections and forget it.
+
+        For an `AsyncEngine` this returns the `dispose()` coroutine, which the
+        caller must await.
+        """
+        with self._lock:
+            for key, registered in list(self._engines.items()):
+                if registered is engine:
+                    del self._engines[key]
+            self._stats.pop(getattr(engine, "sync_engine", engine), None)
+        return engine.dispose()
+
+    def reset_after_fork(self):
+        """
+        Forget engines inherited from a parent process without closing them.
+
+        Call this first thing in a forked child: pooled connections belong to
+        the parent, so they are dropped with `dispose(close=False)` and the
+        child opens its own.
+        """
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+            self._stats.clear()
+        for engine in engines:
+            getattr(engine, "sync_engine", engine).dispose(close=False)
+
+    def dispose_all(self):
+        """Close and forget every registered synchronous engine."""
+        with self._lock:
+            engines = list(self._engines.values())
+            self._engines.clear()
+            self._stats.clear()
+        for engine in engines:
+            getattr(engine, "sync_engine", engine).dispose()
+
+
+registry = EngineRegistry()
+
+
+def get_engine(db_url, **options):
+    """Return the process-wide shared engine for `db_url` (see `EngineRegistry.get_engine`)."""
+    return registry.get_engine(db_url, **options)
+
+
+def get_async_engine(db_url, **options):
+    """Return the process-wide shared async engine for `db_url` (see `EngineRegistry.get_async_engine`)."""
+    return registry.get_async_engine(db_url, **options)
+
+
+def pool_stats(engine):
+    """Return pool usage for a shared engine (see `EngineRegistry.pool_stats`)."""
+    return registry.pool_stats(engine)
@@ -0,0 +1,99 @@
+# Chunked CSV ingestion into RDBMS sources
+import datetime
+import time
+import pandas as pd
+
+
+def _coerce_column(series, column):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return series
+    if python_type is bool:
+        lowered = series.str.strip().str.lower()
+        mapped = lowered.map({"true": True, "t": True, "1": True, "false": False, "f": False, "0": False})
+        invalid = lowered.notna() & mapped.isna()
+        if invalid.any():
+            raise ValueError(f"invalid boolean value {series[invalid].iloc[0]!r}")
+        return mapped.astype("boolean")
+    if python_type is int:
+        return pd.to_numeric(series, errors="raise").astype("Int64")
+    if python_type is float:
+        return pd.to_numeric(series, errors="raise").astype("Float64")
+    if python_type in (datetime.datetime, datetime.date):
+        converted = pd.to_datetime(series, errors="raise")
+        return converted.dt.date if python_type is datetime.date else converted
+    return series
+
+
+def coerce_chunk(model, chunk):
+    """
+    Validate and convert a chunk of CSV strings to the model's column types.
+
+    Args:
+        model: SQLAlchemy model the rows are loaded into.
+        chunk: DataFrame read with `dtype=str`; its columns must be model columns.
+
+    Returns:
+        List of row tuples in the chunk's column order, with None for NULLs.
+
+    Raises:
+        ValueError: If a value cannot be converted or a non-nullable column
+            has missing values.
+    """
+    table = model.__table__
+    for name in chunk.columns:
+        if name not in table.c:
+            raise ValueError(f"Column '{name}' does not exist on {table.name}")
+        column = table.c[name]
+        try:
+            chunk[name] = _coerce_column(chunk[name], column)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Column '{name}': {e}") from e
+        if not column.nullable and chunk[name].isna().any():
+            raise ValueError(f"Column '{name}' is not nullable but has missing values")
+    values = chunk.astype(object).where(chunk.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+
+def ingest_csv(source, model, csv_path, chunk_size=100000, columns=None,
+               conflict_keys=None, update_columns=None, progress=None):
+    """
+    Stream a CSV file into a table in bounded chunks.
+
+    The file is read `chunk_size` rows at a time, each chunk is coerced to the
+    model's column types and loaded with `source.copy_in` (COPY on
+    PostgreSQL, batched inserts elsewhere), so memory stays flat regardless
+    of file size.
+
+    Args:
+        source: GenericRDBMSSource to load into.
+        model: SQLAlchemy model matching the CSV columns.
+        csv_path (str): Path of the CSV file (compressed files are detected
+            from the extension).
+        chunk_size (int): Rows per chunk.
+        columns: CSV columns to load; all columns when None.
+        conflict_keys: Optional key columns giving upsert semantics.
+        update_columns: Columns overwritten on conflict; an empty list skips
+            existing rows.
+        progress: Optional callable receiving the running report after each chunk.
+
+    Returns:
+        dict: `rows`, `chunks`, `seconds` and `rows_per_sec`.
+    """
+    started = time.perf_counter()
+    report = {"rows": 0, "chunks": 0, "seconds": 0.0, "rows_per_sec": 0.0}
+    reader = pd.read_csv(csv_path, chunksize=chunk_size, usecols=columns, dtype=str)
+    with reader:
+        for chunk in reader:
+            try:
+                rows = coerce_chunk(model, chunk)
+            except ValueError as e:
+                raise ValueError(f"Invalid data in chunk {report['chunks'] + 1} of {csv_path}: {e}") from e
+            report["rows"] += source.copy_in(model, list(chunk.columns), rows, conflict_keys, update_columns)
+            report["chunks"] += 1
+            report["seconds"] = time.perf_counter() - started
+            report["rows_per_sec"] = report["rows"] / report["seconds"] if report["seconds"] else 0.0
+            if progress is not None:
+                progress(dict(report))
+    return report
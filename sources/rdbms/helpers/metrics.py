@@ -0,0 +1,379 @@
+# In-process metrics for the RDBMS layer, exportable in Prometheus text format
+import contextvars
+import functools
+import inspect
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+# Operation being recorded in this context; nested source calls made by it
+# (e.g. copy_in -> upsert_many) are part of it and are not recorded again.
+_current_operation = contextvars.ContextVar("rdbms_current_operation", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        unknown = set(labels) - set(self.labelnames)
+        if unknown:
+            raise ValueError(f"Unknown labels for {self.name}: {sorted(unknown)}")
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key):
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set."""
+
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down per label set."""
+
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels))
+
+    def samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observations per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def sum(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[1] if state else 0.0
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(state[0]), state[1], state[2])) for key, state in self._values.items()]
+        for key, (counts, total, count) in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", {**labels, "le": repr(float(bound))}, cumulative
+            yield f"{self.name}_bucket", {**labels, "le": "+Inf"}, count
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class MetricsRegistry:
+    """
+    Named metric families plus collectors refreshed on export.
+
+    Asking for an existing name returns the registered metric, so several
+    sources can share one registry.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._collectors = []
+        self._watched_engines = weakref.WeakSet()
+
+    def _get_or_create(self, metric_class, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, metric_class):
+                raise ValueError(f"Metric '{name}' is already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def watch_engine(self, engine):
+        """Mark `engine` as exported; return False if it already was."""
+        with self._lock:
+            if engine in self._watched_engines:
+                return False
+            self._watched_engines.add(engine)
+            return True
+
+    def add_collector(self, collector):
+        """Register a callable run before every export, e.g. to refresh gauges."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self):
+        """
+        Return every metric in the Prometheus text exposition format (0.0.4).
+
+        Serve it with content type `text/plain; version=0.0.4`.
+        """
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        for collector in collectors:
+            collector()
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {float(value)!r}")
+        return "\n".join(lines) + "\n"
+
+
+default_registry = MetricsRegistry()
+
+# Statements executed on the current thread, across all watched engines.
+_statements = threading.local()
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    _statements.count = getattr(_statements, "count", 0) + 1
+
+
+def statement_count():
+    """Return how many statements the current thread has executed on watched engines."""
+    return getattr(_statements, "count", 0)
+
+
+class SourceMetrics:
+    """The metric families recorded by RDBMS sources and helpers."""
+
+    LABELS = ("operation", "dialect", "model")
+
+    def __init__(self, registry=None):
+        self.registry = registry or default_registry
+        self.latency = self.registry.histogram(
+            "rdbms_operation_duration_seconds", "Latency of data-layer operations.", self.LABELS
+        )
+        self.rows = self.registry.counter(
+            "rdbms_operation_rows_total", "Rows returned or affected by data-layer operations.", self.LABELS
+        )
+        self.statements = self.registry.histogram(
+            "rdbms_operation_statements", "SQL statements executed per operation.", self.LABELS,
+            buckets=STATEMENT_BUCKETS,
+        )
+        self.errors = self.registry.counter(
+            "rdbms_operation_errors_total", "Failed data-layer operations.", self.LABELS + ("error",)
+        )
+        self.pool_checked_out = self.registry.gauge(
+            "rdbms_pool_checked_out", "Connections currently checked out of the pool.", ("engine",)
+        )
+        self.pool_overflow = self.registry.gauge(
+            "rdbms_pool_overflow", "Connections open beyond the pool size.", ("engine",)
+        )
+        self.pool_size = self.registry.gauge("rdbms_pool_size", "Configured pool size.", ("engine",))
+
+    def watch_engine(self, engine):
+        """Count statements run on `engine` and export its pool gauges."""
+        if not event.contains(engine, "before_cursor_execute", _count_statement):
+            event.listen(engine, "before_cursor_execute", _count_statement)
+        if not self.registry.watch_engine(engine):
+            return
+        engine_ref = weakref.ref(engine)
+        label = engine.url.render_as_string(hide_password=True)
+
+        def collect():
+            engine = engine_ref()
+            if engine is None:
+                return
+            pool = engine.pool
+            self.pool_checked_out.set(pool.checkedout() if hasattr(pool, "checkedout") else 0, engine=label)
+            self.pool_overflow.set(max(pool.overflow(), 0) if hasattr(pool, "overflow") else 0, engine=label)
+            if hasattr(pool, "size"):
+                self.pool_size.set(pool.size(), engine=label)
+
+        self.registry.add_collector(collect)
+
+    @contextmanager
+    def observe(self, operation, dialect, model=None):
+        """
+        Time the block and record its outcome.
+
+        Yields a dict; set its "rows" entry to the rows returned or affected.
+        Statements are counted over the whole block unless "statements" is
+        set to a number, for callers that only own part of the block.
+        """
+        labels = {"operation": operation, "dialect": dialect, "model": getattr(model, "__name__", model or "")}
+        outcome = {"rows": 0, "statements": None}
+        started = time.perf_counter()
+        statements = statement_count()
+        try:
+            yield outcome
+        except Exception as e:
+            self.errors.inc(error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.latency.observe(time.perf_counter() - started, **labels)
+            if outcome["statements"] is None:
+                outcome["statements"] = statement_count() - statements
+            self.statements.observe(outcome["statements"], **labels)
+            self.rows.inc(outcome["rows"], **labels)
+
+
+def count_rows(result):
+    """Rows represented by a source method's return value."""
+    if result is None:
+        return 0
+    if isinstance(result, bool):
+        return int(result)
+    if isinstance(result, int):
+        return result
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        values = list(result.values())
+        if values and all(isinstance(value, list) for value in values):
+            return len(values[0])
+    return 1
+
+
+def one_row(result):
+    """Row count for methods that affect exactly one row or raise."""
+    return 1
+
+
+def count_items(item):
+    """Rows represented by one item yielded by a streaming source method."""
+    if isinstance(item, list):
+        return len(item)
+    return count_rows(item) if isinstance(item, dict) else 1
+
+
+def instrumented(operation, rows=count_rows):
+    """
+    Record latency, rows, statements and errors of a source method.
+
+    The decorated method's first argument after `self` must be the model, and
+    the instance must have `metrics` (SourceMetrics) and `engine` attributes.
+    Generator methods are timed until they are exhausted or closed, but only
+    statements run inside the generator body are counted. Calls
+    made while another instrumented method is running in the same context are
+    not recorded separately, so one logical operation is counted once.
+
+    Args:
+        operation (str): Operation label.
+        rows: Callable mapping the return value to a row count.
+    """
+    def decorator(method):
+        if inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def generator_wrapper(self, model, *args, **kwargs):
+                if _current_operation.get() is not None:
+                    yield from method(self, model, *args, **kwargs)
+                    return
+                with self.metrics.observe(operation, self.engine.dialect.name, model) as outcome:
+                    outcome["statements"] = 0
+                    items = method(self, model, *args, **kwargs)
+                    try:
+                        while True:
+                            # Mark and count only while the generator body
+                            # runs, not while the caller handles the item.
+                            token = _current_operation.set(operation)
+                            statements = statement_count()
+                            try:
+                                item = next(items)
+                            except StopIteration:
+                                return
+                            finally:
+                                outcome["statements"] += statement_count() - statements
+                                _current_operation.reset(token)
+                            outcome["rows"] += count_items(item)
+                            yield item
+                    finally:
+                        statements = statement_count()
+                        items.close()
+                        outcome["statements"] += statement_count() - statements
+            return generator_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, model, *args, **kwargs):
+            if _current_operation.get() is not None:
+                return method(self, model, *args, **kwargs)
+            token = _current_operation.set(operation)
+            try:
+                with self.metrics.observe(operation, self.engine.dialect.name, model) as outcome:
+                    result = method(self, model, *args, **kwargs)
+                    outcome["rows"] = rows(result)
+                    return result
+            finally:
+                _current_operation.reset(token)
+        return wrapper
+    return decorator
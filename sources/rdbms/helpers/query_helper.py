@@ -0,0 +1,318 @@
+# Statement-building utilities shared by the RDBMS sources
+from collections import namedtuple
+from itertools import islice
+from sqlalchemy import and_, insert, not_, or_, select
+
+RETURNING_MODES = (None, "keys", "records")
+
+# One unit of work of a batched insert. `kind` tells the source how to run it:
+#   "execute" - execute `statement` with `params`, nothing is collected
+#   "records" - scalars of `statement` with `params` are model instances
+#   "orm"     - `params` are model instances to add and flush
+#   "keys"    - rows of `statement` with `params` are primary keys
+#   "row"     - execute `statement` with the single row `params` and read
+#               `inserted_primary_key`
+InsertStep = namedtuple("InsertStep", ["kind", "statement", "params", "rows"])
+
+
+def batched(iterable, size):
+    """
+    Split an iterable into lists of at most `size` items.
+
+    Args:
+        iterable: Any iterable, including generators.
+        size (int): Maximum number of items per batch.
+
+    Yields:
+        Lists of consecutive items from the iterable.
+    """
+    if size < 1:
+        raise ValueError("Batch size must be a positive integer")
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def primary_key_columns(model):
+    """Return the primary key columns of a mapped model, in table order."""
+    return list(model.__mapper__.primary_key)
+
+
+def primary_key_value(row, pk_columns):
+    """
+    Extract a primary key from a result row.
+
+    Single-column keys are returned as scalars and composite keys as tuples,
+    matching what `Session.get` accepts.
+    """
+    if len(pk_columns) == 1:
+        return row[0]
+    return tuple(row)
+
+
+def plan_inserts(model, rows, batch_size=1000, returning="keys", executemany_returning=True):
+    """
+    Plan the statements of a batched insert.
+
+    Shared by the sync and async sources, which only execute the steps.
+    Without executemany `RETURNING` support (e.g. MySQL), "records" falls
+    back to ORM flushes and "keys" to one INSERT per row.
+
+    Args:
+        model: SQLAlchemy model to insert into.
+        rows: Iterable of dictionaries; rows in one batch should share keys.
+        batch_size (int): Rows per executemany call.
+        returning (str | None): None, "keys" or "records".
+        executemany_returning (bool): The dialect's
+            `insert_executemany_returning` flag.
+
+    Yields:
+        InsertStep tuples, in input order.
+    """
+    if returning not in RETURNING_MODES:
+        raise ValueError(f"Unsupported returning mode: {returning}")
+    table = model.__table__
+    for batch in batched(rows, batch_size):
+        if returning is None:
+            stmt = insert(table).execution_options(insertmanyvalues_page_size=batch_size)
+            yield InsertStep("execute", stmt, batch, len(batch))
+        elif returning == "records" and executemany_returning:
+            stmt = insert(model).returning(model, sort_by_parameter_order=True)
+            yield InsertStep("records", stmt, batch, len(batch))
+        elif returning == "records":
+            yield InsertStep("orm", None, [model(**row) for row in batch], len(batch))
+        elif executemany_returning:
+            stmt = (
+                insert(table)
+                .returning(*primary_key_columns(model), sort_by_parameter_order=True)
+                .execution_options(insertmanyvalues_page_size=batch_size)
+            )
+            yield InsertStep("keys", stmt, batch, len(batch))
+        else:
+            for row in batch:
+                yield InsertStep("row", insert(table), row, 1)
+
+
+def primary_key_criteria(model, record_id):
+    """
+    Build `WHERE` criteria matching a single primary key.
+
+    Args:
+        model: SQLAlchemy model being queried.
+        record_id: Primary key value, or a tuple for composite keys.
+
+    Returns:
+        List of SQL expressions to pass to `where()`.
+    """
+    pk_columns = primary_key_columns(model)
+    values = record_id if isinstance(record_id, tuple) else (record_id,)
+    if len(values) != len(pk_columns):
+        raise ValueError(f"Expected {len(pk_columns)} primary key value(s), got {len(values)}")
+    return [column == value for column, value in zip(pk_columns, values)]
+
+
+# Operators accepted as `field__op` filter keys.
+FILTER_OPERATORS = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "in": lambda column, value: column.in_(value),
+    "notin": lambda column, value: column.not_in(value),
+    "isnull": lambda column, value: column.is_(None) if value else column.is_not(None),
+    "like": lambda column, value: column.like(value),
+    "ilike": lambda column, value: column.ilike(value),
+}
+
+
+# Result shapes accepted by the sources' `mode` argument.
+RESULT_MODES = ("orm", "rows", "dicts", "columns")
+
+
+def _model_attribute(model, field):
+    column = getattr(model, field, None)
+    if column is None or not hasattr(column, "expression"):
+        raise ValueError(f"{model.__name__} has no column '{field}'")
+    return column
+
+
+def build_criteria(model, filters):
+    """
+    Translate a filters dictionary into SQL criteria for `model`.
+
+    Keys are either a field name (equality) or `field__op` with `op` one of
+    `FILTER_OPERATORS`, e.g. `{"id__gt": 20, "phone__isnull": True}`. The
+    keys `"and"`/`"or"` take a list of nested filter dictionaries and `"not"`
+    takes a single one. All entries of a dictionary are combined with AND.
+
+    Args:
+        model: SQLAlchemy model being queried.
+        filters: Filters dictionary as described above.
+
+    Returns:
+        List of SQL expressions to pass to `where()`.
+    """
+    criteria = []
+    for key, value in filters.items():
+        if key in ("and", "or"):
+            clauses = [and_(*build_criteria(model, nested)) for nested in value]
+            criteria.append(and_(*clauses) if key == "and" else or_(*clauses))
+        elif key == "not":
+            criteria.append(not_(and_(*build_criteria(model, value))))
+        else:
+            field, _, op = key.partition("__")
+            operator = FILTER_OPERATORS.get(op or "eq")
+            if operator is None:
+                raise ValueError(f"Unsupported filter operator '{op}' in '{key}'")
+            criteria.append(operator(_model_attribute(model, field), value))
+    return criteria
+
+
+def build_order_by(model, order_by):
+    """
+    Resolve an ordering specification into (column, descending) pairs.
+
+    Args:
+        model: SQLAlchemy model being queried.
+        order_by: Field name or list of field names; a leading `-` sorts
+            descending, e.g. `["-id"]`.
+
+    Returns:
+        List of (column, descending) tuples.
+    """
+    if isinstance(order_by, str):
+        order_by = [order_by]
+    return [
+        (_model_attribute(model, field.lstrip("-")), field.startswith("-"))
+        for field in order_by
+    ]
+
+
+def with_primary_key_tiebreak(model, ordering):
+    """
+    Append the primary key columns missing from `ordering`, ascending.
+
+    This makes the ordering total, so keyset paging never skips or repeats
+    rows sharing the values of a non-unique sort column.
+    """
+    present = {column.key for column, _ in ordering}
+    mapper = model.__mapper__
+    extra = [
+        (_model_attribute(model, mapper.get_property_by_column(column).key), False)
+        for column in primary_key_columns(model)
+        if mapper.get_property_by_column(column).key not in present
+    ]
+    return list(ordering) + extra
+
+
+def build_keyset_criteria(ordering, after):
+    """
+    Build the predicate selecting rows strictly after `after` in `ordering`.
+
+    For ordering (a, b) and after (x, y) this is
+    `a > x OR (a = x AND b > y)`, with `<` for descending columns. The
+    expanded form works on dialects without row-value comparison (Oracle,
+    MSSQL) and is served by a composite index on the ordering columns.
+    Ordering columns are assumed to be non-NULL.
+    """
+    if not isinstance(after, (tuple, list)):
+        after = (after,)
+    if len(after) != len(ordering):
+        raise ValueError(f"Expected {len(ordering)} keyset value(s), got {len(after)}")
+    alternatives = []
+    for i, ((column, descending), value) in enumerate(zip(ordering, after)):
+        prefix = [ordering[j][0] == after[j] for j in range(i)]
+        alternatives.append(and_(*prefix, column < value if descending else column > value))
+    return or_(*alternatives)
+
+
+def model_columns(model, fields=None):
+    """
+    Return Core columns of `model` labelled with their attribute names.
+
+    Selecting these instead of the entity yields plain rows, skipping ORM
+    instance construction and state tracking.
+
+    Args:
+        model: SQLAlchemy model.
+        fields: Attribute names to include; all column attributes when None.
+    """
+    column_attrs = model.__mapper__.column_attrs
+    if fields is None:
+        props = list(column_attrs)
+    else:
+        missing = [field for field in fields if field not in column_attrs]
+        if missing:
+            raise ValueError(f"{model.__name__} has no column(s) {missing}")
+        props = [column_attrs[field] for field in fields]
+    return [prop.columns[0].label(prop.key) for prop in props]
+
+
+def check_mode(mode):
+    if mode not in RESULT_MODES:
+        raise ValueError(f"Unsupported result mode '{mode}', expected one of {RESULT_MODES}")
+
+
+def shape_rows(keys, rows, mode):
+    """
+    Convert result rows into the shape requested by `mode`.
+
+    Args:
+        keys: Column names of the result.
+        rows: Sequence of row tuples.
+        mode (str): "rows" keeps the tuples, "dicts" returns one dict per row
+            and "columns" returns a dict mapping each column to a list.
+    """
+    if mode == "dicts":
+        return [dict(zip(keys, row)) for row in rows]
+    if mode == "columns":
+        return {key: [row[i] for row in rows] for i, key in enumerate(keys)}
+    return list(rows)
+
+
+def build_select(model, filters, order_by=None, limit=None, after=None, columns=None, mode="orm"):
+    """
+    Build a SELECT for `model` with filtering, ordering, keyset paging and projection.
+
+    Args:
+        model: SQLAlchemy model to query.
+        filters: Filters dictionary, see `build_criteria`.
+        order_by: Ordering specification, see `build_order_by`. Defaults to
+            the primary key when `after` is given.
+        limit (int): Maximum number of rows.
+        after: Values of the `order_by` columns of the last row already seen,
+            followed by its primary key values unless the primary key is
+            already part of `order_by` (a scalar for single-column
+            orderings). Only rows after it are returned, which pages without
+            OFFSET. The primary key is always appended to the ordering as a
+            tiebreaker, so rows sharing a sort value are neither skipped nor
+            repeated across pages.
+        columns: Field names to select instead of whole records.
+        mode (str): Any mode other than "orm" selects Core columns (all of
+            them unless `columns` is given) rather than the entity.
+
+    Returns:
+        A `Select` statement.
+    """
+    check_mode(mode)
+    if columns or mode != "orm":
+        stmt = select(*model_columns(model, columns))
+    else:
+        stmt = select(model)
+    stmt = stmt.where(*build_criteria(model, filters))
+    if order_by is None and after is not None:
+        mapper = model.__mapper__
+        order_by = [mapper.get_property_by_column(column).key for column in primary_key_columns(model)]
+    if order_by:
+        ordering = with_primary_key_tiebreak(model, build_order_by(model, order_by))
+        if after is not None:
+            stmt = stmt.where(build_keyset_criteria(ordering, after))
+        stmt = stmt.order_by(*(column.desc() if descending else column.asc() for column, descending in ordering))
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
@@ -1,19 +1,31 @@
+import logging
 from contextlib import contextmanager
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from .engine_registry import get_engine, pool_stats
+from .metrics import SourceMetrics
+
+logger = logging.getLogger(__name__)
 
 class RDBMSHelper:
-    def __init__(self, db_url):
-        self.engine = create_engine(db_url)
+    def __init__(self, db_url, metrics=None, **engine_options):
+        self.engine = get_engine(db_url, **engine_options)
         self.Session = sessionmaker(bind=self.engine)
+        self.metrics = SourceMetrics(metrics)
+        self.metrics.watch_engine(self.engine)
+
+    def pool_stats(self):
+        return pool_stats(self.engine)
 
     @contextmanager
     def get_session(self):
         session = self.Session()
+        dialect = self.engine.dialect.name
         try:
-            yield session
-            session.commit()
+            with self.metrics.observe("session", dialect):
+                yield session
+                session.commit()
         except Exception as e:
+            logger.error("Database error in session: %s", e, extra={"operation": "session", "dialect": dialect})
             session.rollback()
             raise
         finally:
@@ -23,4 +35,4 @@ class RDBMSHelper:
         base.metadata.create_all(self.engine)
 
     def drop_all_tables(self, base):
-        base.metadata.drop_all(self.engine)
\ No newline at end of file
+        base.metadata.drop_all(self.engine)
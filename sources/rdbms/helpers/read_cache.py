@@ -0,0 +1,154 @@
+# In-process read-through cache for primary-key lookups
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class ReadCache:
+    """
+    Bounded LRU cache of records keyed by (model, primary key), with TTL.
+
+    Cached records are detached instances shared between callers, so they
+    should be treated as read-only. Sources invalidate entries themselves on
+    writes; external writers are only picked up once entries expire.
+
+    Every invalidation bumps a generation counter. Readers take
+    `generation()` before querying and pass it to `put`, which drops the
+    result if the key was invalidated in between, so a read that raced a
+    write cannot re-cache the old row.
+    """
+
+    def __init__(self, max_size=10000, ttl=60.0, negative_ttl=None, clock=time.monotonic):
+        """
+        Args:
+            max_size (int): Maximum number of entries; least recently used
+                entries are evicted beyond it.
+            ttl (float): Seconds a found record stays cached. None disables expiry.
+            negative_ttl (float): Seconds a miss (no such row) stays cached.
+                None disables negative caching.
+            clock: Monotonic time source, overridable for tests.
+        """
+        if max_size < 1:
+            raise ValueError("Cache size must be a positive integer")
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = 0
+        # Generation of the latest invalidation per key (bounded like the
+        # entries; `_floor` covers keys that fell off) and per model.
+        self._invalidated = OrderedDict()
+        self._model_invalidated = {}
+        self._floor = 0
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_puts = 0
+
+    def get(self, model, key):
+        """
+        Look up a record.
+
+        Returns:
+            Tuple (found, record). `found` is True for cached records and for
+            cached misses, in which case `record` is None.
+        """
+        with self._lock:
+            entry = self._entries.get((model, key))
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is not None and expires_at <= self._clock():
+                    del self._entries[(model, key)]
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end((model, key))
+                    if value is _MISSING:
+                        self.negative_hits += 1
+                        return True, None
+                    self.hits += 1
+                    return True, value
+            self.misses += 1
+            return False, None
+
+    def generation(self):
+        """Return the current invalidation generation, to pass to `put`."""
+        with self._lock:
+            return self._generation
+
+    def _last_invalidation(self, model, key):
+        return max(
+            self._invalidated.get((model, key), 0),
+            self._model_invalidated.get(model, 0),
+            self._floor,
+        )
+
+    def put(self, model, key, record, generation=None):
+        """
+        Cache a record, or a miss when `record` is None and negative caching is on.
+
+        Args:
+            generation (int): Value of `generation()` taken before the record
+                was read. The record is dropped if the key was invalidated
+                since then.
+        """
+        if record is None:
+            if self.negative_ttl is None:
+                return
+            value, ttl = _MISSING, self.negative_ttl
+        else:
+            value, ttl = record, self.ttl
+        expires_at = None if ttl is None else self._clock() + ttl
+        with self._lock:
+            if generation is not None and self._last_invalidation(model, key) > generation:
+                self.stale_puts += 1
+                return
+            self._entries[(model, key)] = (value, expires_at)
+            self._entries.move_to_end((model, key))
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, model, key):
+        with self._lock:
+            self._entries.pop((model, key), None)
+            self._generation += 1
+            self._invalidated[(model, key)] = self._generation
+            self._invalidated.move_to_end((model, key))
+            while len(self._invalidated) > self.max_size:
+                _, generation = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, generation)
+
+    def invalidate_model(self, model):
+        """Drop every entry of `model`, used after set-based writes."""
+        with self._lock:
+            for cache_key in [k for k in self._entries if k[0] is model]:
+                del self._entries[cache_key]
+            self._generation += 1
+            self._model_invalidated[model] = self._generation
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._floor = self._generation
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.negative_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "negative_hits": self.negative_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "stale_puts": self.stale_puts,
+                "hit_ratio": ((self.hits + self.negative_hits) / lookups) if lookups else 0.0,
+            }
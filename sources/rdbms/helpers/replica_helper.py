@@ -0,0 +1,188 @@
+# Read-replica selection, latency tracking and health checks
+import itertools
+import threading
+import time
+from sqlalchemy import event, text
+from sqlalchemy.orm import sessionmaker
+from .engine_registry import get_engine
+
+BALANCING_STRATEGIES = ("round_robin", "least_latency")
+
+
+class Replica:
+    """
+    One read replica: its engine, session factory, latency and health state.
+
+    Engines are shared through the registry, so replicas are too: every
+    `ReplicaSet` on the same engine gets the same `Replica` from `acquire`,
+    and its event listeners are registered once and removed by the last
+    `release`.
+    """
+
+    def __init__(self, url, engine, alpha=0.2):
+        self.url = url
+        self.engine = engine
+        self.Session = sessionmaker(bind=engine)
+        self.alpha = alpha
+        self.latency = None
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.eject_seconds = 30.0
+        self.refs = 0
+        self._lock = threading.Lock()
+        self._listeners = [
+            ("before_cursor_execute", self._started),
+            ("after_cursor_execute", self._finished),
+            ("handle_error", self._failed),
+        ]
+
+    def record_latency(self, seconds):
+        self.latency = seconds if self.latency is None else self.alpha * seconds + (1 - self.alpha) * self.latency
+
+    def available(self, now):
+        return self.ejected_until <= now
+
+    def eject(self, seconds=None):
+        with self._lock:
+            self.failures += 1
+            self.ejected_until = time.monotonic() + (self.eject_seconds if seconds is None else seconds)
+
+    def _started(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info["replica_started"] = time.perf_counter()
+
+    def _finished(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("replica_started", None)
+        if started is not None:
+            self.record_latency(time.perf_counter() - started)
+
+    def _failed(self, context):
+        # Connect failures (no connection yet) and dropped connections mean
+        # the replica is unhealthy; statement errors do not.
+        if context.is_disconnect or context.connection is None:
+            self.eject()
+
+    def instrument(self):
+        for name, listener in self._listeners:
+            if not event.contains(self.engine, name, listener):
+                event.listen(self.engine, name, listener)
+
+    def uninstrument(self):
+        for name, listener in self._listeners:
+            if event.contains(self.engine, name, listener):
+                event.remove(self.engine, name, listener)
+
+
+_replicas = {}
+_replicas_lock = threading.Lock()
+
+
+def acquire(url, engine, eject_seconds):
+    """Return the shared `Replica` of `engine`, instrumenting it on first use."""
+    with _replicas_lock:
+        replica = _replicas.get(engine)
+        if replica is None:
+            replica = _replicas[engine] = Replica(url, engine)
+            replica.instrument()
+        replica.refs += 1
+        replica.eject_seconds = eject_seconds
+        return replica
+
+
+def release(replica):
+    """Drop one reference; the last one removes the engine's listeners."""
+    with _replicas_lock:
+        replica.refs -= 1
+        if replica.refs <= 0 and _replicas.get(replica.engine) is replica:
+            del _replicas[replica.engine]
+            replica.uninstrument()
+
+
+class ReplicaSet:
+    """
+    Balances reads over replica engines and ejects unhealthy ones.
+
+    Replicas are ejected for `eject_seconds` when a connection or disconnect
+    error is raised on them, and become eligible again afterwards (or as soon
+    as `check_health` finds them reachable).
+    """
+
+    def __init__(self, replica_urls, balancing="round_robin", eject_seconds=30.0, **engine_options):
+        if balancing not in BALANCING_STRATEGIES:
+            raise ValueError(f"Unsupported balancing '{balancing}', expected one of {BALANCING_STRATEGIES}")
+        self.balancing = balancing
+        self.eject_seconds = eject_seconds
+        self._counter = itertools.count()
+        self._stop = None
+        self._health_thread = None
+        self.replicas = [acquire(url, get_engine(url, **engine_options), eject_seconds) for url in replica_urls]
+
+    def choose(self):
+        """Return the replica for the next read, or None when all are ejected."""
+        now = time.monotonic()
+        candidates = [replica for replica in self.replicas if replica.available(now)]
+        if not candidates:
+            return None
+        if self.balancing == "least_latency":
+            return min(candidates, key=lambda replica: replica.latency or 0.0)
+        return candidates[next(self._counter) % len(candidates)]
+
+    def eject(self, replica):
+        replica.eject(self.eject_seconds)
+
+    def check_health(self):
+        """
+        Ping every replica with `SELECT 1`, re-admitting healthy ones.
+
+        Returns:
+            dict: Replica URL to True (healthy) or False (ejected).
+        """
+        results = {}
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    connection.execute(text("SELECT 1"))
+            except Exception:
+                # Connect failures were already ejected by the error hook.
+                if replica.available(time.monotonic()):
+                    self.eject(replica)
+                results[replica.url] = False
+            else:
+                replica.ejected_until = 0.0
+                results[replica.url] = True
+        return results
+
+    def start_health_checks(self, interval):
+        """Run `check_health` every `interval` seconds on a daemon thread until `close`."""
+        if self._health_thread is not None:
+            return self._stop
+        stop = self._stop = threading.Event()
+
+        def run():
+            while not stop.wait(interval):
+                self.check_health()
+
+        self._health_thread = threading.Thread(target=run, name="replica-health", daemon=True)
+        self._health_thread.start()
+        return stop
+
+    def close(self):
+        """Stop health checks and release the replicas' engine listeners."""
+        if self._stop is not None:
+            self._stop.set()
+            self._health_thread.join()
+            self._stop = self._health_thread = None
+        replicas, self.replicas = self.replicas, []
+        for replica in replicas:
+            release(replica)
+
+    def stats(self):
+        now = time.monotonic()
+        return {
+            replica.url: {
+                "available": replica.available(now),
+                "latency_ms": (replica.latency or 0.0) * 1000,
+                "failures": replica.failures,
+            }
+            for replica in self.replicas
+        }
+
@@ -0,0 +1,280 @@
+# Opt-in recorder for slow SQL statements, with background EXPLAIN capture
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from logging.handlers import RotatingFileHandler
+import sqlalchemy
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_HELPERS_DIR = os.path.dirname(os.path.abspath(__file__))
+_SKIPPED_DIRS = (
+    _HELPERS_DIR,
+    os.path.join(os.path.dirname(_HELPERS_DIR), "sources"),
+    os.path.dirname(os.path.abspath(sqlalchemy.__file__)),
+    os.path.dirname(os.path.abspath(contextlib.__file__)),
+)
+_EXPLAINABLE = ("select", "with", "insert", "update", "delete")
+
+
+def parameter_shape(parameters):
+    """
+    Describe bound parameters by type only, so no values are recorded.
+
+    Returns:
+        A dict of name to type name, a list of type names for positional
+        parameters, or `{"rows": n, "row": shape}` for executemany batches.
+    """
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return {"rows": len(parameters), "row": parameter_shape(parameters[0])}
+        return [type(value).__name__ for value in parameters]
+    return None
+
+
+def _caller():
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if not filename.startswith(_SKIPPED_DIRS):
+            return f"{filename}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return None
+
+
+def explain_prefix(dialect_name, statement, analyze=True, analyze_writes=False):
+    """
+    Return the EXPLAIN prefix for a statement, or None if it should not be explained.
+
+    ANALYZE executes the statement, so on PostgreSQL writes are only analyzed
+    with `analyze_writes`; the plan connection is rolled back afterwards.
+    """
+    verb = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    if verb not in _EXPLAINABLE:
+        return None
+    if dialect_name == "postgresql":
+        if analyze and (verb in ("select", "with") or analyze_writes):
+            return "EXPLAIN (ANALYZE, BUFFERS) "
+        return "EXPLAIN "
+    if dialect_name in ("mysql", "mariadb"):
+        return "EXPLAIN "
+    if dialect_name == "sqlite":
+        return "EXPLAIN QUERY PLAN "
+    return None
+
+
+class SlowQueryRecorder:
+    """
+    Records statements slower than a threshold on the engines it is attached to.
+
+    Each entry holds the SQL, the shape of its bound parameters (never the
+    values), the duration and the application frame that issued it. Plans are
+    captured on a single background thread with a separate connection, so
+    the slow request itself never waits for EXPLAIN. Entries are kept in a
+    ring buffer and optionally appended as JSON lines to a rotating log file.
+
+    Plans add load exactly when the database is already slow, so they are
+    limited: at most `max_pending` EXPLAINs wait at a time (overflow is
+    dropped and counted) and each distinct SQL text is explained at most once
+    per `explain_interval` seconds.
+    """
+
+    def __init__(self, threshold=0.5, capacity=1000, explain=True, analyze=True, log_path=None,
+                 max_bytes=10 * 1024 * 1024, backup_count=5, max_pending=16, explain_interval=60.0,
+                 analyze_writes=False):
+        """
+        Args:
+            threshold (float): Minimum statement duration in seconds to record.
+            capacity (int): Number of entries kept in memory.
+            explain (bool): Capture plans for PostgreSQL, MySQL and SQLite.
+            analyze (bool): Use `EXPLAIN (ANALYZE, BUFFERS)` for PostgreSQL
+                reads. This re-runs the query in the background.
+            analyze_writes (bool): Also ANALYZE INSERT/UPDATE/DELETE. They
+                are executed and rolled back.
+            log_path (str): Optional file receiving one JSON line per entry.
+            max_bytes (int): Size at which the log file is rotated.
+            backup_count (int): Rotated log files kept.
+            max_pending (int): EXPLAINs allowed to wait for the background
+                thread; further ones are skipped and counted in `dropped`.
+            explain_interval (float): Minimum seconds between plans of the
+                same SQL text; repeats are counted in `rate_limited`.
+        """
+        self.threshold = threshold
+        self.explain = explain
+        self.analyze = analyze
+        self.analyze_writes = analyze_writes
+        self.max_pending = max_pending
+        self.explain_interval = explain_interval
+        self.dropped = 0
+        self.rate_limited = 0
+        self._pending = 0
+        self._explained_at = OrderedDict()
+        self._capacity = capacity
+        self._entries = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._attached = weakref.WeakSet()
+        self._executor = None
+        self._log = None
+        if log_path:
+            self._log = logging.getLogger(f"{__name__}.{id(self)}")
+            self._log.propagate = False
+            self._log.setLevel(logging.INFO)
+            self._log.addHandler(RotatingFileHandler(log_path, maxBytes=max_bytes, backupCount=backup_count))
+
+    def attach(self, engine):
+        """Start recording slow statements run on `engine`."""
+        with self._lock:
+            if engine in self._attached:
+                return
+            self._attached.add(engine)
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._failed)
+
+    def _failed(self, context):
+        started = context.connection.info.get("slow_query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("slow_query_started")
+        if not started:
+            return
+        duration = time.perf_counter() - started.pop()
+        if duration < self.threshold or conn.info.get("slow_query_explaining"):
+            return
+        entry = {
+            "timestamp": time.time(),
+            "dialect": conn.dialect.name,
+            "sql": statement,
+            "parameters": parameter_shape(parameters),
+            "executemany": executemany,
+            "duration_ms": duration * 1000,
+            "caller": _caller(),
+            "plan": None,
+        }
+        with self._lock:
+            self._entries.append(entry)
+        prefix = None
+        if self.explain and not executemany:
+            prefix = explain_prefix(conn.dialect.name, statement, self.analyze, self.analyze_writes)
+        if prefix is None or not self._admit(statement, entry):
+            self._write(entry)
+            return
+        self._pool().submit(self._explain, conn.engine, prefix + statement, parameters, entry)
+
+    def _admit(self, statement, entry):
+        # Decide whether to queue an EXPLAIN; bound both the queue and the
+        # rate per SQL text.
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained_at.get(statement)
+            if last is not None and now - last < self.explain_interval:
+                self.rate_limited += 1
+                entry["plan"] = "EXPLAIN skipped: explained recently"
+                return False
+            if self._pending >= self.max_pending:
+                self.dropped += 1
+                entry["plan"] = "EXPLAIN skipped: queue full"
+                return False
+            self._pending += 1
+            self._explained_at[statement] = now
+            self._explained_at.move_to_end(statement)
+            while len(self._explained_at) > self._capacity:
+                self._explained_at.popitem(last=False)
+            return True
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+            return self._executor
+
+    def _explain(self, engine, statement, parameters, entry):
+        try:
+            with engine.connect() as connection:
+                connection.info["slow_query_explaining"] = True
+                try:
+                    rows = connection.exec_driver_sql(statement, parameters).all()
+                finally:
+                    connection.info.pop("slow_query_explaining", None)
+                    connection.rollback()
+            plan = "\n".join(" | ".join(str(value) for value in row) for row in rows)
+        except Exception as e:
+            logger.warning("EXPLAIN failed for slow query: %s", e, extra={"dialect": engine.dialect.name})
+            plan = f"EXPLAIN failed: {e}"
+        with self._lock:
+            entry["plan"] = plan
+            self._pending -= 1
+        self._write(entry)
+
+    def _write(self, entry):
+        if self._log is not None:
+            self._log.info(json.dumps(entry, default=str))
+
+    def entries(self, min_duration_ms=None, limit=None):
+        """
+        Return recorded entries, slowest first.
+
+        Args:
+            min_duration_ms (float): Only entries at least this slow.
+            limit (int): Maximum number of entries.
+        """
+        with self._lock:
+            entries = [dict(entry) for entry in self._entries]
+        if min_duration_ms is not None:
+            entries = [entry for entry in entries if entry["duration_ms"] >= min_duration_ms]
+        entries.sort(key=lambda entry: entry["duration_ms"], reverse=True)
+        return entries[:limit] if limit is not None else entries
+
+    def wait(self, timeout=None):
+        """Block until plans queued so far have been captured."""
+        with self._lock:
+            executor = self._executor
+        if executor is not None:
+            executor.submit(lambda: None).result(timeout)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._explained_at.clear()
+
+    def stats(self):
+        """Return entry count, EXPLAINs waiting, and EXPLAINs dropped or rate-limited."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "pending": self._pending,
+                "dropped": self.dropped,
+                "rate_limited": self.rate_limited,
+            }
+
+    def close(self):
+        """Stop recording on every attached engine and finish pending EXPLAINs."""
+        with self._lock:
+            engines = list(self._attached)
+            self._attached = weakref.WeakSet()
+            executor, self._executor = self._executor, None
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", self._before)
+            event.remove(engine, "after_cursor_execute", self._after)
+            event.remove(engine, "handle_error", self._failed)
+        if executor is not None:
+            executor.shutdown(wait=True)
+        if self._log is not None:
+            for handler in list(self._log.handlers):
+                handler.close()
+                self._log.removeHandler(handler)
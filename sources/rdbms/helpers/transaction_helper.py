@@ -0,0 +1,68 @@
+# Unit-of-work scope shared by several source operations
+from contextlib import contextmanager
+from sqlalchemy import inspect
+
+
+def record_write(session, model, record_id=None):
+    """Remember that `model` (or one record of it) changed in `session`."""
+    session.info.setdefault("writes", []).append((model, record_id))
+
+
+def pop_writes(session):
+    """Return and forget the writes recorded in `session`."""
+    return session.info.pop("writes", [])
+
+
+class Transaction:
+    """
+    One session and one commit shared by source operations on a thread.
+
+    Created by `GenericRDBMSSource.transaction`; operations called on the
+    source inside the `with` block join it instead of committing themselves.
+    """
+
+    def __init__(self, session, flush_every=None):
+        """
+        Args:
+            session: Session the transaction runs on.
+            flush_every (int): Flush added records once this many are pending,
+                so they are inserted together. None flushes every `create`
+                immediately, which assigns generated keys right away.
+        """
+        self.session = session
+        self.flush_every = flush_every
+        self._added = []
+
+    def add(self, record):
+        """Add a new record, flushing according to `flush_every`."""
+        self.session.add(record)
+        self._added.append(record)
+        if self.flush_every is None or len(self._added) >= self.flush_every:
+            self.flush()
+        return record
+
+    def flush(self):
+        """Send pending changes to the database without committing."""
+        self.session.flush()
+        for record in self._added:
+            identity = inspect(record).identity
+            record_write(self.session, type(record), identity[0] if len(identity) == 1 else identity)
+        self._added = []
+
+    @contextmanager
+    def savepoint(self):
+        """
+        Run the block in a SAVEPOINT.
+
+        If the block raises, only its work is rolled back and the exception
+        propagates; catch it to carry on with the rest of the transaction.
+        """
+        self.flush()
+        try:
+            with self.session.begin_nested():
+                yield self
+                self.flush()
+        except Exception:
+            # Records added inside the savepoint were discarded with it.
+            self._added = []
+            raise
@@ -0,0 +1,268 @@
+import logging
+from sqlalchemy import delete, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from ..helpers.engine_registry import get_async_engine, pool_stats
+from ..helpers.dialect_helper import build_upsert_batches, to_async_url
+from ..helpers.query_helper import (
+    build_criteria,
+    build_select,
+    plan_inserts,
+    primary_key_columns,
+    primary_key_criteria,
+    primary_key_value,
+    shape_rows,
+)
+
+logger = logging.getLogger(__name__)
+
+class AsyncGenericRDBMSSource:
+    """
+    asyncio counterpart of GenericRDBMSSource.
+
+    Every method is a coroutine (or an async generator for `iter_filter`)
+    running on SQLAlchemy's `AsyncEngine`, so callers on an event loop can keep
+    many queries in flight without thread pools.
+    """
+
+    def __init__(self, db_url, **engine_options):
+        """
+        Initialize the source on the process-wide shared async engine.
+
+        Args:
+            db_url: Database connection string. Plain URLs are switched to the
+                default async driver (asyncpg, aiomysql, aiosqlite, ...).
+            **engine_options: Pool and engine options, see
+                `EngineRegistry.get_async_engine`.
+        """
+        self.engine = get_async_engine(to_async_url(db_url), **engine_options)
+        # Expired attributes cannot lazy-load outside the event loop's
+        # greenlet, so records keep their loaded state after commit.
+        self.Session = async_sessionmaker(bind=self.engine, expire_on_commit=False)
+
+    def pool_stats(self):
+        """Return checkout wait times and saturation of the underlying pool."""
+        return pool_stats(self.engine)
+
+    async def create(self, model, data):
+        session = self.Session()
+        try:
+            record = model(**data)
+            session.add(record)
+            await session.commit()
+            await session.refresh(record)
+            return record
+        except SQLAlchemyError as e:
+            logger.error("Database error during create: %s", e,
+                         extra={"operation": "create", "dialect": self.engine.dialect.name})
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    async def create_many(self, model, rows, batch_size=1000, returning="keys"):
+        """
+        Insert many records in batches; see `GenericRDBMSSource.create_many`.
+        """
+        steps = plan_inserts(model, rows, batch_size, returning, self.engine.dialect.insert_executemany_returning)
+        session = self.Session()
+        try:
+            pk_columns = primary_key_columns(model)
+            results = []
+            count = 0
+            for step in steps:
+                count += step.rows
+                if step.kind == "execute":
+                    await session.execute(step.statement, step.params)
+                elif step.kind == "records":
+                    results.extend((await session.scalars(step.statement, step.params)).all())
+                elif step.kind == "orm":
+                    session.add_all(step.params)
+                    await session.flush()
+                    results.extend(step.params)
+                elif step.kind == "keys":
+                    result = await session.execute(step.statement, step.params)
+                    results.extend(primary_key_value(row, pk_columns) for row in result)
+                else:
+                    result = await session.execute(step.statement, step.params)
+                    results.append(primary_key_value(result.inserted_primary_key, pk_columns))
+            await session.commit()
+            return count if returning is None else results
+        except SQLAlchemyError as e:
+            logger.error("Database error during create_many: %s", e,
+                         extra={"operation": "create_many", "dialect": self.engine.dialect.name})
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    async def upsert_many(self, model, rows, conflict_keys, update_columns=None, batch_size=500):
+        """
+        Insert rows, resolving conflicts in the database; see
+        `GenericRDBMSSource.upsert_many`.
+        """
+        session = self.Session()
+        try:
+            affected = 0
+            for stmt in build_upsert_batches(
+                self.engine.dialect, model.__table__, rows, conflict_keys, update_columns, batch_size
+            ):
+                affected += max((await session.execute(stmt)).rowcount, 0)
+            await session.commit()
+            return affected
+        except SQLAlchemyError as e:
+            logger.error("Database error during upsert_many: %s", e,
+                         extra={"operation": "upsert_many", "dialect": self.engine.dialect.name})
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    async def read(self, model, record_id):
+        session = self.Session()
+        try:
+            return await session.get(model, record_id)
+        except SQLAlchemyError as e:
+            logger.error("Database error during read: %s", e,
+                         extra={"operation": "read", "dialect": self.engine.dialect.name})
+            raise
+        finally:
+            await session.close()
+
+    async def filter(self, model, filters, order_by=None, limit=None, after=None, columns=None, mode="orm"):
+        """Fetch records matching the filters; see `GenericRDBMSSource.filter`."""
+        if columns and mode == "orm":
+            mode = "rows"
+        session = self.Session()
+        try:
+            stmt = build_select(model, filters, order_by, limit, after, columns, mode)
+            result = await session.execute(stmt)
+            if mode == "orm":
+                return result.scalars().all()
+            return shape_rows(list(result.keys()), result.all(), mode)
+        except SQLAlchemyError as e:
+            logger.error("Database error during filter: %s", e,
+                         extra={"operation": "filter", "dialect": self.engine.dialect.name})
+            raise
+        finally:
+            await session.close()
+
+    async def iter_filter(self, model, filters, batch_size=1000, batches=False, order_by=None, columns=None,
+                          mode="orm"):
+        """
+        Stream records matching the filters; see `GenericRDBMSSource.iter_filter`.
+
+        Consumers that may stop early should wrap the generator in
+        `contextlib.aclosing` so the session is released promptly.
+        """
+        if columns and mode == "orm":
+            mode = "rows"
+        session = self.Session()
+        try:
+            stmt = build_select(model, filters, order_by=order_by, columns=columns, mode=mode).execution_options(
+                yield_per=batch_size
+            )
+            result = await session.stream(stmt)
+            if mode == "orm":
+                result = result.scalars()
+                if batches:
+                    async for partition in result.partitions():
+                        yield partition
+                else:
+                    async for record in result:
+                        yield record
+                return
+            keys = list(result.keys())
+            async for partition in result.partitions():
+                shaped = shape_rows(keys, partition, mode)
+                if batches or mode == "columns":
+                    yield shaped
+                else:
+                    for row in shaped:
+                        yield row
+        except SQLAlchemyError as e:
+            logger.error("Database error during iter_filter: %s", e,
+                         extra={"operation": "iter_filter", "dialect": self.engine.dialect.name})
+            raise
+        finally:
+            await session.close()
+
+    async def update(self, model, record_id, update_fields):
+        session = self.Session()
+        try:
+            stmt = (
+                update(model)
+                .where(*primary_key_criteria(model, record_id))
+                .values(**update_fields)
+                .execution_options(synchronize_session=False)
+            )
+            if (await session.execute(stmt)).rowcount == 0:
+                raise ValueError(f"Record with id {record_id} not found")
+            await session.commit()
+        except SQLAlchemyError as e:
+            logger.error("Database error during update: %s", e,
+                         extra={"operation": "update", "dialect": self.engine.dialect.name})
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    async def update_where(self, model, filters, values):
+        """Update every matching record in one statement; returns the row count."""
+        session = self.Session()
+        try:
+            stmt = (
+                update(model)
+                .where(*build_criteria(model, filters))
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            count = (await session.execute(stmt)).rowcount
+            await session.commit()
+            return count
+        except SQLAlchemyError as e:
+            logger.error("Database error during update_where: %s", e,
+                         extra={"operation": "update_where", "dialect": self.engine.dialect.name})
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    async def delete(self, model, record_id):
+        session = self.Session()
+        try:
+            stmt = (
+                delete(model)
+                .where(*primary_key_criteria(model, record_id))
+                .execution_options(synchronize_session=False)
+            )
+            if (await session.execute(stmt)).rowcount == 0:
+                raise ValueError(f"Record with id {record_id} not found")
+            await session.commit()
+        except SQLAlchemyError as e:
+            logger.error("Database error during delete: %s", e,
+                         extra={"operation": "delete", "dialect": self.engine.dialect.name})
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
+
+    async def delete_where(self, model, filters):
+        """Delete every matching record in one statement; returns the row count."""
+        session = self.Session()
+        try:
+            stmt = (
+                delete(model)
+                .where(*build_criteria(model, filters))
+                .execution_options(synchronize_session=False)
+            )
+            count = (await session.execute(stmt)).rowcount
+            await session.commit()
+            return count
+        except SQLAlchemyError as e:
+            logger.error("Database error during delete_where: %s", e,
+                         extra={"operation": "delete_where", "dialect": self.engine.dialect.name})
+            await session.rollback()
+            raise
+        finally:
+            await session.close()
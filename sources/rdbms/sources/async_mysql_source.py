@@ -0,0 +1,16 @@
+import logging
+from .async_generic_rdbms_source import AsyncGenericRDBMSSource
+
+logger = logging.getLogger(__name__)
+
+class AsyncMySQLSource(AsyncGenericRDBMSSource):
+    def __init__(self, db_url, **engine_options):
+        """
+        Initialize the async MySQL source.
+        Args:
+            db_url (str): SQLAlchemy connection URL for MySQL. Plain `mysql://`
+                URLs use the aiomysql driver.
+            **engine_options: Pool and engine options, see AsyncGenericRDBMSSource.
+        """
+        super().__init__(db_url, **engine_options)
+        logger.info("Initialized async MySQL Source", extra={"dialect": self.engine.dialect.name})
@@ -0,0 +1,9 @@
+import logging
+from .async_generic_rdbms_source import AsyncGenericRDBMSSource
+
+logger = logging.getLogger(__name__)
+
+class AsyncPostgresSource(AsyncGenericRDBMSSource):
+    def __init__(self, db_url, **engine_options):
+        super().__init__(db_url, **engine_options)
+        logger.info("Initialized async PostgreSQL Source", extra={"dialect": self.engine.dialect.name})
@@ -1,80 +1,653 @@
-from sqlalchemy import create_engine
+import csv
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import delete, inspect, select, update
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
+from ..helpers.engine_registry import get_engine, pool_stats
+from ..helpers.dialect_helper import (
+    build_upsert_batches,
+    copy_query_out,
+    copy_rows,
+    max_in_list_size,
+    supports_copy,
+)
+from ..helpers.metrics import SourceMetrics, instrumented, one_row
+from ..helpers.replica_helper import ReplicaSet
+from ..helpers.transaction_helper import Transaction, pop_writes, record_write
+from ..helpers.query_helper import (
+    batched,
+    build_criteria,
+    build_select,
+    model_columns,
+    plan_inserts,
+    primary_key_columns,
+    primary_key_criteria,
+    primary_key_value,
+    shape_rows,
+)
+
+logger = logging.getLogger(__name__)
 
 class GenericRDBMSSource:
-    def __init__(self, db_url):
-        self.engine = create_engine(db_url)
-        self.Session = sessionmaker(bind=self.engine)
+    def __init__(self, db_url, read_cache=None, replica_urls=None, balancing="round_robin",
+                 read_your_writes=0.0, replica_eject_seconds=30.0, health_check_interval=None,
+                 metrics=None, slow_query_recorder=None, **engine_options):
+        """
+        Initialize the source on the process-wide shared engine for `db_url`.
 
-    def create(self, model, data):
+        Args:
+            db_url: Database connection string of the primary.
+            read_cache (ReadCache): Optional cache serving `read` by primary
+                key. Writes through this source invalidate affected entries.
+            replica_urls: Optional read replica connection strings. `read`,
+                `read_many`, `filter`, `iter_filter` and exports then run on
+                a replica; writes always go to the primary.
+            balancing (str): "round_robin" or "least_latency" replica selection.
+            read_your_writes (float): Seconds after a write during which reads
+                from the same thread stay on the primary, so they observe it
+                despite replication lag. Replica reads in this window after
+                any write are also kept out of the read cache. 0 disables
+                both, so cached replica reads may be stale for up to the
+                cache TTL.
+            replica_eject_seconds (float): How long a replica that raised a
+                connection error is skipped before being tried again.
+            health_check_interval (float): If set, ping replicas on a
+                background thread every this many seconds.
+            metrics (MetricsRegistry): Registry receiving operation latency,
+                row, statement and error metrics plus pool gauges; defaults to
+                `metrics.default_registry`.
+            slow_query_recorder (SlowQueryRecorder): Optional recorder
+                attached to the primary and replica engines.
+            **engine_options: Pool tuning (`pool_size`, `max_overflow`,
+                `pool_recycle`, `pool_pre_ping`, `pool_timeout`, `warmup`) and
+                other `create_engine` arguments, see `EngineRegistry.get_engine`.
+                Replica engines use the same options.
+        """
+        self.engine = get_engine(db_url, **engine_options)
+        self.Session = sessionmaker(bind=self.engine, expire_on_commit=False)
+        self.read_cache = read_cache
+        self.replicas = None
+        if replica_urls:
+            self.replicas = ReplicaSet(replica_urls, balancing, replica_eject_seconds, **engine_options)
+            if health_check_interval:
+                self.replicas.start_health_checks(health_check_interval)
+        self.read_your_writes = read_your_writes
+        self._local = threading.local()
+        self._last_write_at = None
+        self.metrics = SourceMetrics(metrics)
+        self.slow_queries = slow_query_recorder
+        engines = [self.engine] + [replica.engine for replica in (self.replicas.replicas if self.replicas else ())]
+        for engine in engines:
+            self.metrics.watch_engine(engine)
+            if slow_query_recorder is not None:
+                slow_query_recorder.attach(engine)
+
+    def pool_stats(self):
+        """Return checkout wait times and saturation of the underlying pool."""
+        return pool_stats(self.engine)
+
+    def close(self):
+        """Stop replica health checks and remove this source's replica listeners."""
+        if self.replicas is not None:
+            self.replicas.close()
+
+    def cache_stats(self):
+        """Return hit/miss/eviction counters of the read cache, or None without one."""
+        return self.read_cache.stats() if self.read_cache else None
+
+    def replica_stats(self):
+        """Return availability, latency and failure counts per replica, or None without replicas."""
+        return self.replicas.stats() if self.replicas else None
+
+    def check_replicas(self):
+        """Ping every replica now, ejecting unreachable ones and re-admitting healthy ones."""
+        return self.replicas.check_health() if self.replicas else {}
+
+    def current_transaction(self):
+        """Return the transaction open on this thread, or None."""
+        return getattr(self._local, "transaction", None)
+
+    @contextmanager
+    def transaction(self, flush_every=None):
+        """
+        Run several source operations in one session and one commit.
+
+        Calls made on this source from the same thread inside the block share
+        the transaction's session; nothing is committed until the block exits
+        and everything is rolled back if it raises. Reads inside the block see
+        its uncommitted writes and bypass replicas and the read cache. Nesting
+        `transaction()` opens a savepoint instead.
+
+        Example:
+            with source.transaction(flush_every=100) as tx:
+                for row in rows:
+                    source.create(User, row)
+                with tx.savepoint():
+                    source.update(User, 1, {"name": "Renamed"})
+
+        Args:
+            flush_every (int): Batch `create` calls into one flush per this
+                many records; see `Transaction`.
+
+        Yields:
+            Transaction: Exposes `session`, `flush()` and `savepoint()`.
+        """
+        current = self.current_transaction()
+        if current is not None:
+            with current.savepoint():
+                yield current
+            return
         session = self.Session()
+        tx = Transaction(session, flush_every)
+        self._local.transaction = tx
         try:
-            record = model(**data)
-            session.add(record)
+            yield tx
+            tx.flush()
             session.commit()
-            session.refresh(record)
-            return record
+            self._apply_writes(session)
         except SQLAlchemyError as e:
-            print(f"Database error during create: {e}")
+            logger.error("Database error during transaction: %s", e,
+                         extra={"operation": "transaction", "dialect": self.engine.dialect.name})
             session.rollback()
             raise
         finally:
+            self._local.transaction = None
             session.close()
 
-    def read(self, model, record_id):
-        session = self.Session()
-        try:
-            return session.get(model, record_id)
-        except SQLAlchemyError as e:
-            print(f"Database error during read: {e}")
-            raise
-        finally:
-            session.close()
+    @contextmanager
+    def get_session(self, operation="session", readonly=False):
+        """
+        Provide a session that commits on success and rolls back on error.
 
-    def filter(self, model, filters):
-        session = self.Session()
+        Inside `transaction()` the transaction's session is provided instead
+        (after flushing pending records) and committing is left to it.
+
+        Args:
+            operation (str): Name used in error messages.
+            readonly (bool): Use a replica session when possible and skip the
+                commit.
+
+        Yields:
+            Session
+        """
+        tx = self.current_transaction()
+        if tx is not None:
+            try:
+                tx.flush()
+                yield tx.session
+            except SQLAlchemyError as e:
+                logger.error("Database error during %s: %s", operation, e,
+                             extra={"operation": operation, "dialect": self.engine.dialect.name})
+                raise
+            return
+        session = self._read_session() if readonly else self.Session()
         try:
-            query = session.query(model)
-            for field, value in filters.items():
-                query = query.filter(getattr(model, field) == value)
-            return query.all()
+            yield session
+            if not readonly:
+                session.commit()
+                self._apply_writes(session)
         except SQLAlchemyError as e:
-            print(f"Database error during filter: {e}")
+            logger.error("Database error during %s: %s", operation, e,
+                         extra={"operation": operation, "dialect": self.engine.dialect.name})
+            session.rollback()
             raise
         finally:
             session.close()
 
-    def update(self, model, record_id, update_fields):
-        session = self.Session()
-        try:
+    def _read_session(self):
+        # Reads go to a replica unless none is available or this thread wrote
+        # within the read-your-writes window.
+        if self.replicas is not None:
+            last_write = getattr(self._local, "last_write", None)
+            if last_write is None or time.monotonic() - last_write >= self.read_your_writes:
+                replica = self.replicas.choose()
+                if replica is not None:
+                    return replica.Session()
+        return self.Session()
+
+    def _synchronize_session(self):
+        # Instances loaded earlier in a transaction() block must see its
+        # set-based writes; a fresh per-call session holds none to update.
+        return "fetch" if self.current_transaction() is not None else False
+
+    def _use_cache(self):
+        return self.read_cache is not None and self.current_transaction() is None
+
+    def _cacheable(self, session):
+        # A replica may not have applied a write yet. Results it returns
+        # within the read-your-writes window after any write are not cached,
+        # so they cannot pin an old row until the TTL; replica lag beyond
+        # that window is not covered.
+        if session.get_bind() is self.engine or self._last_write_at is None:
+            return True
+        return time.monotonic() - self._last_write_at >= self.read_your_writes
+
+    def _apply_writes(self, session):
+        # Runs after commit. A reader that queried before the commit may
+        # still try to cache the old row afterwards; `ReadCache.put` drops
+        # it because the invalidation bumped the key's generation.
+        writes = pop_writes(session)
+        if not writes:
+            return
+        self._local.last_write = self._last_write_at = time.monotonic()
+        if self.read_cache is None:
+            return
+        for model, record_id in writes:
+            if record_id is None:
+                self.read_cache.invalidate_model(model)
+            else:
+                self.read_cache.invalidate(model, record_id)
+
+    @instrumented("create")
+    def create(self, model, data):
+        tx = self.current_transaction()
+        if tx is not None:
+            return tx.add(model(**data))
+        with self.get_session("create") as session:
+            record = model(**data)
+            session.add(record)
+            session.flush()
+            session.refresh(record)
+            identity = inspect(record).identity
+            record_write(session, model, identity[0] if len(identity) == 1 else identity)
+            return record
+
+    @instrumented("create_many")
+    def create_many(self, model, rows, batch_size=1000, returning="keys"):
+        """
+        Insert many records using batched executemany / multi-row VALUES.
+
+        Each batch is sent as a single executemany call, which SQLAlchemy
+        renders as multi-row `INSERT ... VALUES` pages on drivers that support
+        it. All batches are committed together, and no per-row refresh SELECT
+        is issued.
+
+        Args:
+            model: SQLAlchemy model to insert into.
+            rows: Iterable of dictionaries with field-value pairs. Rows in one
+                batch should share the same keys.
+            batch_size (int): Number of rows sent per executemany call.
+            returning (str | None): What to return:
+                - None: only the number of inserted rows.
+                - "keys": generated primary keys, in input order (scalars for
+                  single-column keys, tuples for composite keys).
+                - "records": model instances populated via `RETURNING`.
+                Drivers without executemany `RETURNING` (e.g. MySQL) fall
+                back to one INSERT per row for "keys" and "records"; pass
+                None there for bulk loads.
+
+        Returns:
+            int, list of keys, or list of records depending on `returning`.
+        """
+        steps = plan_inserts(model, rows, batch_size, returning, self.engine.dialect.insert_executemany_returning)
+        with self.get_session("create_many") as session:
+            pk_columns = primary_key_columns(model)
+            results = []
+            count = 0
+            for step in steps:
+                count += step.rows
+                if step.kind == "execute":
+                    session.execute(step.statement, step.params)
+                elif step.kind == "records":
+                    results.extend(session.scalars(step.statement, step.params).all())
+                elif step.kind == "orm":
+                    session.add_all(step.params)
+                    session.flush()
+                    results.extend(step.params)
+                elif step.kind == "keys":
+                    result = session.execute(step.statement, step.params)
+                    results.extend(primary_key_value(row, pk_columns) for row in result)
+                else:
+                    result = session.execute(step.statement, step.params)
+                    results.append(primary_key_value(result.inserted_primary_key, pk_columns))
+            record_write(session, model)
+            return count if returning is None else results
+
+    @instrumented("upsert_many")
+    def upsert_many(self, model, rows, conflict_keys, update_columns=None, batch_size=500):
+        """
+        Insert rows, resolving conflicts on `conflict_keys` in the database.
+
+        Every batch is sent as one dialect-specific statement (see
+        `dialect_helper.build_upsert`), and all batches share one commit.
+        Rows repeating a conflict key within a batch are collapsed, the last
+        one winning.
+
+        Args:
+            model: SQLAlchemy model to upsert into.
+            rows: Iterable of dictionaries sharing the same keys.
+            conflict_keys: Columns of the unique/primary key to match on.
+            update_columns: Columns to overwrite for existing rows. None updates
+                every non-key column; an empty list skips existing rows.
+            batch_size (int): Maximum rows per statement. Capped so a batch
+                stays within the dialect's bind-parameter limit.
+
+        Returns:
+            int: Driver-reported number of affected rows.
+        """
+        with self.get_session("upsert_many") as session:
+            affected = 0
+            for stmt in build_upsert_batches(
+                self.engine.dialect, model.__table__, rows, conflict_keys, update_columns, batch_size
+            ):
+                affected += max(session.execute(stmt).rowcount, 0)
+            record_write(session, model)
+            return affected
+
+    @instrumented("copy_in")
+    def copy_in(self, model, columns, rows, conflict_keys=None, update_columns=None):
+        """
+        Bulk-load a chunk of rows using the fastest path the dialect offers.
+
+        PostgreSQL uses `COPY FROM STDIN` (staged through a temporary table
+        when `conflict_keys` is given); other dialects fall back to
+        `upsert_many` or batched `create_many`. The chunk is committed once.
+
+        Args:
+            model: SQLAlchemy model to load into.
+            columns: Column names, in the order of the values in each row.
+            rows: Sequence of row tuples aligned with `columns`.
+            conflict_keys: Optional key columns giving upsert semantics.
+            update_columns: Columns overwritten on conflict, see `upsert_many`.
+
+        Returns:
+            int: Number of rows sent to the database.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        if not supports_copy(self.engine.dialect):
+            records = [dict(zip(columns, row)) for row in rows]
+            if conflict_keys is not None:
+                self.upsert_many(model, records, conflict_keys, update_columns)
+            else:
+                self.create_many(model, records, returning=None)
+            return len(rows)
+        with self.get_session("copy_in") as session:
+            count = copy_rows(session.connection(), model.__table__, columns, rows, conflict_keys, update_columns)
+            record_write(session, model)
+            return count
+
+    @instrumented("copy_out")
+    def copy_out(self, model, fileobj, columns=None, filters=None, header=True, batch_size=10000):
+        """
+        Write matching rows to a text file object as CSV.
+
+        PostgreSQL streams with `COPY (SELECT ...) TO STDOUT`; other dialects
+        read through a server-side cursor `batch_size` rows at a time. Either
+        way memory use does not depend on the table size.
+
+        Args:
+            model: SQLAlchemy model to export.
+            fileobj: Text file object to write to.
+            columns: Field names to export; all columns when None.
+            filters: Filters dictionary, see `filter`.
+            header (bool): Write the column names as the first line.
+            batch_size (int): Rows per fetch on the cursor fallback.
+
+        Returns:
+            int: Number of rows written.
+        """
+        filters = filters or {}
+        if supports_copy(self.engine.dialect):
+            with self.get_session("copy_out", readonly=True) as session:
+                stmt = build_select(model, filters, columns=columns, mode="rows")
+                return copy_query_out(session.connection(), stmt, fileobj, header)
+        writer = csv.writer(fileobj)
+        if header:
+            writer.writerow([column.key for column in model_columns(model, columns)])
+        count = 0
+        for rows in self.iter_filter(model, filters, batch_size, batches=True, columns=columns, mode="rows"):
+            writer.writerows(rows)
+            count += len(rows)
+        return count
+
+    @instrumented("read")
+    def read(self, model, record_id, mode="orm"):
+        """
+        Read a record by its primary key.
+
+        Args:
+            model: SQLAlchemy model to query.
+            record_id: Primary key value, or a tuple for composite keys.
+            mode (str): "orm" returns a model instance; "rows" a plain row
+                tuple and "dicts" a dictionary, both without ORM overhead and
+                bypassing the read cache.
+
+        Returns:
+            The record if found, or None.
+        """
+        if mode != "orm":
+            if mode not in ("rows", "dicts"):
+                raise ValueError(f"Unsupported result mode for read: '{mode}'")
+            return self._read_row(model, record_id, mode)
+        use_cache = self._use_cache()
+        if use_cache:
+            found, record = self.read_cache.get(model, record_id)
+            if found:
+                return record
+            generation = self.read_cache.generation()
+        with self.get_session("read", readonly=True) as session:
             record = session.get(model, record_id)
-            if not record:
+            if use_cache and self._cacheable(session):
+                self.read_cache.put(model, record_id, record, generation)
+            return record
+
+    def _read_row(self, model, record_id, mode):
+        with self.get_session("read", readonly=True) as session:
+            stmt = build_select(model, {}, mode=mode).where(*primary_key_criteria(model, record_id))
+            result = session.execute(stmt)
+            rows = shape_rows(list(result.keys()), result.all(), mode)
+            return rows[0] if rows else None
+
+    @instrumented("read_many", rows=len)
+    def read_many(self, model, record_ids, chunk_size=None, as_dict=False):
+        """
+        Read many records by primary key with chunked `WHERE pk IN (...)` queries.
+
+        Chunks never exceed the dialect's IN-list / bind-parameter limits
+        (e.g. 1000 on Oracle, ~2100 on MSSQL). Ids already in the read cache
+        are served from it, and fetched records and misses are cached.
+
+        Args:
+            model: SQLAlchemy model with a single-column primary key.
+            record_ids: Iterable of primary key values; duplicates are allowed.
+            chunk_size (int): Maximum ids per query, capped by the dialect limit.
+            as_dict (bool): Return a dict keyed by id instead of a list.
+
+        Returns:
+            List of records aligned with `record_ids` (None for misses), or a
+            dict mapping each distinct id to its record or None.
+        """
+        pk_columns = primary_key_columns(model)
+        if len(pk_columns) != 1:
+            raise ValueError("read_many requires a single-column primary key")
+        record_ids = list(record_ids)
+        use_cache = self._use_cache()
+        found = {}
+        pending = []
+        for record_id in dict.fromkeys(record_ids):
+            if use_cache:
+                hit, record = self.read_cache.get(model, record_id)
+                if hit:
+                    found[record_id] = record
+                    continue
+            pending.append(record_id)
+
+        if use_cache:
+            generation = self.read_cache.generation()
+        limit = max_in_list_size(self.engine.dialect)
+        chunk_size = min(chunk_size or limit, limit)
+        pk_attribute = getattr(model, model.__mapper__.get_property_by_column(pk_columns[0]).key)
+        with self.get_session("read_many", readonly=True) as session:
+            for chunk in batched(pending, chunk_size):
+                for record in session.scalars(select(model).where(pk_attribute.in_(chunk))):
+                    found[getattr(record, pk_attribute.key)] = record
+            cacheable = use_cache and self._cacheable(session)
+            for record_id in pending:
+                record = found.setdefault(record_id, None)
+                if cacheable:
+                    self.read_cache.put(model, record_id, record, generation)
+        if as_dict:
+            return {record_id: found[record_id] for record_id in dict.fromkeys(record_ids)}
+        return [found[record_id] for record_id in record_ids]
+
+    @instrumented("filter")
+    def filter(self, model, filters, order_by=None, limit=None, after=None, columns=None, mode="orm"):
+        """
+        Fetch records matching the filters.
+
+        Filtering, ordering, limits and keyset pagination are all pushed into
+        SQL; see `query_helper.build_select` for the filter language.
+
+        Args:
+            model: SQLAlchemy model to query.
+            filters: Filters dictionary, e.g. `{"id__gt": 20, "phone__isnull": True}`.
+            order_by: Field name or list of names, `-` prefix for descending.
+            limit (int): Maximum number of rows to return.
+            after: `order_by` values of the last row of the previous page,
+                then its primary key unless `order_by` already includes it.
+            columns: Field names to select; rows are returned as tuples.
+            mode (str): "orm" (model instances), "rows" (tuples), "dicts"
+                (one dict per row) or "columns" (dict of column lists). All
+                but "orm" run a Core select with no ORM instrumentation.
+
+        Returns:
+            List of records/rows/dicts, or a dict of lists for "columns".
+        """
+        if columns and mode == "orm":
+            mode = "rows"
+        with self.get_session("filter", readonly=True) as session:
+            stmt = build_select(model, filters, order_by, limit, after, columns, mode)
+            result = session.execute(stmt)
+            if mode == "orm":
+                return result.scalars().all()
+            return shape_rows(list(result.keys()), result.all(), mode)
+
+    @instrumented("iter_filter")
+    def iter_filter(self, model, filters, batch_size=1000, batches=False, order_by=None, columns=None,
+                    mode="orm"):
+        """
+        Stream records matching the filters without loading the full result.
+
+        Rows are fetched through a server-side cursor (`stream_results`) in
+        chunks of `batch_size` (`yield_per`), so memory stays bounded by the
+        batch size. The session stays open only while the generator is being
+        consumed and is closed once it is exhausted or closed.
+
+        Args:
+            model: SQLAlchemy model to query.
+            filters: Filters dictionary, see `filter`.
+            batch_size (int): Number of rows fetched per round trip.
+            batches (bool): Yield lists of up to `batch_size` records instead
+                of single records.
+            order_by: Field name or list of names, `-` prefix for descending.
+            columns: Field names to select; rows are yielded as tuples.
+            mode (str): Result shape, see `filter`. "columns" always yields
+                one column-oriented dict per batch.
+
+        Yields:
+            Records/rows/dicts, or lists of them when `batches` is True.
+        """
+        if columns and mode == "orm":
+            mode = "rows"
+        with self.get_session("iter_filter", readonly=True) as session:
+            stmt = build_select(model, filters, order_by=order_by, columns=columns, mode=mode).execution_options(
+                stream_results=True, yield_per=batch_size
+            )
+            result = session.execute(stmt)
+            if mode == "orm":
+                result = result.scalars()
+                if batches:
+                    yield from result.partitions()
+                else:
+                    yield from result
+                return
+            keys = list(result.keys())
+            for partition in result.partitions():
+                shaped = shape_rows(keys, partition, mode)
+                if batches or mode == "columns":
+                    yield shaped
+                else:
+                    yield from shaped
+
+    @instrumented("update", rows=one_row)
+    def update(self, model, record_id, update_fields):
+        with self.get_session("update") as session:
+            stmt = (
+                update(model)
+                .where(*primary_key_criteria(model, record_id))
+                .values(**update_fields)
+                .execution_options(synchronize_session=self._synchronize_session())
+            )
+            if session.execute(stmt).rowcount == 0:
                 raise ValueError(f"Record with id {record_id} not found")
-            for field, value in update_fields.items():
-                setattr(record, field, value)
-            session.commit()
-        except SQLAlchemyError as e:
-            print(f"Database error during update: {e}")
-            session.rollback()
-            raise
-        finally:
-            session.close()
+            record_write(session, model, record_id)
+
+    @instrumented("update_where")
+    def update_where(self, model, filters, values):
+        """
+        Update every record matching the filters with a single `UPDATE` statement.
+
+        No records are loaded into the session.
 
+        Args:
+            model: SQLAlchemy model to update.
+            filters: Dictionary of field-value pairs selecting the records.
+            values: Dictionary of field-value pairs to set.
+
+        Returns:
+            int: Number of rows updated.
+        """
+        with self.get_session("update_where") as session:
+            stmt = (
+                update(model)
+                .where(*build_criteria(model, filters))
+                .values(**values)
+                .execution_options(synchronize_session=self._synchronize_session())
+            )
+            count = session.execute(stmt).rowcount
+            record_write(session, model)
+            return count
+
+    @instrumented("delete", rows=one_row)
     def delete(self, model, record_id):
-        session = self.Session()
-        try:
-            record = session.get(model, record_id)
-            if not record:
+        with self.get_session("delete") as session:
+            stmt = (
+                delete(model)
+                .where(*primary_key_criteria(model, record_id))
+                .execution_options(synchronize_session=self._synchronize_session())
+            )
+            if session.execute(stmt).rowcount == 0:
                 raise ValueError(f"Record with id {record_id} not found")
-            session.delete(record)
-            session.commit()
-        except SQLAlchemyError as e:
-            print(f"Database error during delete: {e}")
-            session.rollback()
-            raise
-        finally:
-            session.close()
+            record_write(session, model, record_id)
+
+    @instrumented("delete_where")
+    def delete_where(self, model, filters):
+        """
+        Delete every record matching the filters with a single `DELETE` statement.
+
+        Empty filters delete all rows of the table.
+
+        Args:
+            model: SQLAlchemy model to delete from.
+            filters: Dictionary of field-value pairs selecting the records.
+
+        Returns:
+            int: Number of rows deleted.
+        """
+        with self.get_session("delete_where") as session:
+            stmt = (
+                delete(model)
+                .where(*build_criteria(model, filters))
+                .execution_options(synchronize_session=self._synchronize_session())
+            )
+            count = session.execute(stmt).rowcount
+            record_write(session, model)
+            return count
 
 
 
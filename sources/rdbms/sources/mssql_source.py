@@ -1,17 +1,21 @@
+import logging
 from .generic_rdbms_source import GenericRDBMSSource
 
+logger = logging.getLogger(__name__)
+
 class MSSQLSource(GenericRDBMSSource):
-    def __init__(self, db_url):
+    def __init__(self, db_url, **engine_options):
         """
         Initialize the MSSQL source.
         Args:
             db_url (str): SQLAlchemy connection URL for MSSQL.
+            **engine_options: Pool and engine options, see GenericRDBMSSource.
         """
-        super().__init__(db_url)
-        print("Initialized MSSQL Source")
+        super().__init__(db_url, **engine_options)
+        logger.info("Initialized MSSQL Source", extra={"dialect": self.engine.dialect.name})
 
     def connect(self):
         """
         Additional connection logic for MSSQL, if required.
         """
-        print("Connected to MSSQL database.")
+        logger.info("Connected to MSSQL database", extra={"dialect": self.engine.dialect.name})
@@ -1,17 +1,21 @@
+import logging
 from .generic_rdbms_source import GenericRDBMSSource
 
+logger = logging.getLogger(__name__)
+
 class MySQLSource(GenericRDBMSSource):
-    def __init__(self, db_url):
+    def __init__(self, db_url, **engine_options):
         """
         Initialize the MySQL source.
         Args:
             db_url (str): SQLAlchemy connection URL for MySQL.
+            **engine_options: Pool and engine options, see GenericRDBMSSource.
         """
-        super().__init__(db_url)
-        print("Initialized MySQL Source")
+        super().__init__(db_url, **engine_options)
+        logger.info("Initialized MySQL Source", extra={"dialect": self.engine.dialect.name})
 
     def connect(self):
         """
         Additional connection logic for MySQL, if required.
         """
-        print("Connected to MySQL database.")
+        logger.info("Connected to MySQL database", extra={"dialect": self.engine.dialect.name})
@@ -1,17 +1,21 @@
+import logging
 from .generic_rdbms_source import GenericRDBMSSource
 
+logger = logging.getLogger(__name__)
+
 class OracleSource(GenericRDBMSSource):
-    def __init__(self, db_url):
+    def __init__(self, db_url, **engine_options):
         """
         Initialize the Oracle source.
         Args:
             db_url (str): SQLAlchemy connection URL for Oracle.
+            **engine_options: Pool and engine options, see GenericRDBMSSource.
         """
-        super().__init__(db_url)
-        print("Initialized Oracle Source")
+        super().__init__(db_url, **engine_options)
+        logger.info("Initialized Oracle Source", extra={"dialect": self.engine.dialect.name})
 
     def connect(self):
         """
         Additional connection logic for Oracle, if required.
         """
-        print("Connected to Oracle database.")
+        logger.info("Connected to Oracle database", extra={"dialect": self.engine.dialect.name})
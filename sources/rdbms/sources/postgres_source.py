@@ -1,6 +1,9 @@
+import logging
 from .generic_rdbms_source import GenericRDBMSSource
 
+logger = logging.getLogger(__name__)
+
 class PostgresSource(GenericRDBMSSource):
-    def __init__(self, db_url):
-        super().__init__(db_url)
-        print("Initialized PostgreSQL Source.")
+    def __init__(self, db_url, **engine_options):
+        super().__init__(db_url, **engine_options)
+        logger.info("Initialized PostgreSQL Source", extra={"dialect": self.engine.dialect.name})
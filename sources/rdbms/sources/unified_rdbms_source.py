@@ -1,15 +1,208 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .postgres_source import PostgresSource
 from .mysql_source import MySQLSource
 from .oracle_source import OracleSource
 from .mssql_source import MSSQLSource
 
-class UnifiedRDBMSSource(PostgresSource, MySQLSource, OracleSource, MSSQLSource):
-    def __init__(self, postgres_url=None, mysql_url=None, oracle_url=None, mssql_url=None):
-        if postgres_url:
-            PostgresSource.__init__(self, postgres_url)
-        if mysql_url:
-            MySQLSource.__init__(self, mysql_url)
-        if oracle_url:
-            OracleSource.__init__(self, oracle_url)
-        if mssql_url:
-            MSSQLSource.__init__(self, mssql_url)
+
+class _LatencyStats:
+    """Per-backend call latency, with an exponentially weighted moving average."""
+
+    def __init__(self, alpha=0.2):
+        self._lock = threading.Lock()
+        self.alpha = alpha
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+        self.ewma = None
+
+    def record(self, seconds, failed=False):
+        with self._lock:
+            self.calls += 1
+            self.errors += int(failed)
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            self.last = seconds
+            self.ewma = seconds if self.ewma is None else self.alpha * seconds + (1 - self.alpha) * self.ewma
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "avg_ms": (self.total / self.calls * 1000) if self.calls else 0.0,
+                "ewma_ms": (self.ewma or 0.0) * 1000,
+                "max_ms": self.max * 1000,
+                "last_ms": self.last * 1000,
+            }
+
+
+class UnifiedRDBMSSource:
+    """
+    Routes operations across several RDBMS backends, each with its own engine.
+
+    Operations go to the backend named explicitly with `backend=`, else to the
+    backend routed for the model, else to the default backend. Fan-out reads
+    query several backends concurrently on a thread pool.
+    """
+
+    BACKENDS = {
+        "postgres": PostgresSource,
+        "mysql": MySQLSource,
+        "oracle": OracleSource,
+        "mssql": MSSQLSource,
+    }
+
+    def __init__(self, postgres_url=None, mysql_url=None, oracle_url=None, mssql_url=None,
+                 routes=None, default_backend=None, max_workers=None, **engine_options):
+        """
+        Args:
+            postgres_url, mysql_url, oracle_url, mssql_url: Connection URLs of
+                the backends to enable.
+            routes: Optional mapping of model class to backend name.
+            default_backend (str): Backend used for unrouted models; defaults
+                to the first configured one.
+            max_workers (int): Threads used for fan-out; defaults to one per backend.
+            **engine_options: Pool and engine options applied to every backend.
+        """
+        self.backends = {}
+        self.latency = {}
+        urls = {"postgres": postgres_url, "mysql": mysql_url, "oracle": oracle_url, "mssql": mssql_url}
+        for name, url in urls.items():
+            if url:
+                self.add_backend(name, self.BACKENDS[name](url, **engine_options))
+        self.routes = dict(routes or {})
+        self.default_backend = default_backend
+        self.max_workers = max_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def add_backend(self, name, source):
+        """Register an additional backend source under `name`."""
+        self.backends[name] = source
+        self.latency[name] = _LatencyStats()
+
+    def route(self, model, backend_name):
+        """Send every operation on `model` to `backend_name` unless overridden per call."""
+        if backend_name not in self.backends:
+            raise ValueError(f"Unknown backend '{backend_name}'")
+        self.routes[model] = backend_name
+
+    def backend_for(self, model=None, backend=None):
+        """Return (name, source) of the backend an operation on `model` would use."""
+        name = backend or self.routes.get(model) or self.default_backend or next(iter(self.backends), None)
+        if name not in self.backends:
+            raise ValueError(f"No backend configured for '{name or getattr(model, '__name__', model)}'")
+        return name, self.backends[name]
+
+    def call(self, method, model, *args, backend=None, **kwargs):
+        """Run `method` of the routed backend source and record its latency."""
+        name, source = self.backend_for(model, backend)
+        started = time.perf_counter()
+        failed = True
+        try:
+            result = getattr(source, method)(model, *args, **kwargs)
+            failed = False
+            return result
+        finally:
+            self.latency[name].record(time.perf_counter() - started, failed)
+
+    def create(self, model, data, backend=None):
+        return self.call("create", model, data, backend=backend)
+
+    def create_many(self, model, rows, backend=None, **kwargs):
+        return self.call("create_many", model, rows, backend=backend, **kwargs)
+
+    def upsert_many(self, model, rows, conflict_keys, update_columns=None, backend=None, **kwargs):
+        return self.call("upsert_many", model, rows, conflict_keys, update_columns, backend=backend, **kwargs)
+
+    def read(self, model, record_id, backend=None, **kwargs):
+        return self.call("read", model, record_id, backend=backend, **kwargs)
+
+    def read_many(self, model, record_ids, backend=None, **kwargs):
+        return self.call("read_many", model, record_ids, backend=backend, **kwargs)
+
+    def filter(self, model, filters, backend=None, **kwargs):
+        return self.call("filter", model, filters, backend=backend, **kwargs)
+
+    def iter_filter(self, model, filters, backend=None, **kwargs):
+        name, source = self.backend_for(model, backend)
+        started = time.perf_counter()
+        failed = True
+        try:
+            yield from source.iter_filter(model, filters, **kwargs)
+            failed = False
+        finally:
+            self.latency[name].record(time.perf_counter() - started, failed)
+
+    def update(self, model, record_id, update_fields, backend=None):
+        return self.call("update", model, record_id, update_fields, backend=backend)
+
+    def update_where(self, model, filters, values, backend=None):
+        return self.call("update_where", model, filters, values, backend=backend)
+
+    def delete(self, model, record_id, backend=None):
+        return self.call("delete", model, record_id, backend=backend)
+
+    def delete_where(self, model, filters, backend=None):
+        return self.call("delete_where", model, filters, backend=backend)
+
+    def _pool(self):
+        with self._executor_lock:
+            if self._executor is None:
+                workers = self.max_workers or max(len(self.backends), 1)
+                self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rdbms-fanout")
+            return self._executor
+
+    def iter_fan_out(self, method, model, *args, backends=None, **kwargs):
+        """
+        Run `method` on several backends concurrently, yielding results as they finish.
+
+        Args:
+            method (str): Source method to call, e.g. "filter" or "read_many".
+            model: SQLAlchemy model passed to each backend.
+            *args: Positional arguments after the model.
+            backends: Backend names to query; all configured backends when None.
+            **kwargs: Keyword arguments for the method.
+
+        Yields:
+            Tuples (backend_name, result), fastest backend first. An error on
+            one backend is raised once the backends before it have been yielded.
+        """
+        names = list(backends or self.backends)
+        futures = {
+            self._pool().submit(self.call, method, model, *args, backend=name, **kwargs): name
+            for name in names
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+    def fan_out_filter(self, model, filters, backends=None, **kwargs):
+        """
+        Query several backends concurrently and merge their results.
+
+        Returns:
+            List concatenating each backend's results, in completion order.
+        """
+        merged = []
+        for _, results in self.iter_fan_out("filter", model, filters, backends=backends, **kwargs):
+            merged.extend(results)
+        return merged
+
+    def latency_stats(self):
+        """Return call counts, errors and average/EWMA/max latency per backend."""
+        return {name: stats.snapshot() for name, stats in self.latency.items()}
+
+    def close(self):
+        """Shut down the fan-out thread pool and close backends that support it."""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        for source in self.backends.values():
+            if hasattr(source, "close"):
+                source.close()
@@ -0,0 +1,758 @@
+import json
+import threading
+import pytest
+from sources.rdbms.helpers.engine_registry import registry
+from sources.rdbms.helpers.rdbms_helper import RDBMSHelper
+from sources.rdbms.sources.generic_rdbms_source import GenericRDBMSSource
+from sources.rdbms.models.models import Base, User
+
+
+@pytest.fixture
+def source(tmp_path):
+    """Fixture to initialize GenericRDBMSSource on a file-backed SQLite database."""
+    source = GenericRDBMSSource(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(source.engine)
+    yield source
+    registry.dispose(source.engine)
+
+
+def make_users(start, count):
+    return [
+        {"id": i, "name": f"User {i}", "email": f"user{i}@example.com"}
+        for i in range(start, start + count)
+    ]
+
+
+def test_create_many_returns_keys_in_order(source):
+    keys = source.create_many(User, make_users(1, 25), batch_size=10)
+    assert keys == list(range(1, 26))
+    assert len(source.filter(User, {})) == 25
+
+
+def test_create_many_generated_keys(source):
+    rows = ({"name": f"Gen {i}", "email": f"gen{i}@example.com"} for i in range(5))
+    keys = source.create_many(User, rows, batch_size=2)
+    assert len(keys) == 5
+    assert source.read(User, keys[-1]).name == "Gen 4"
+
+
+def test_create_many_count_and_records(source):
+    assert source.create_many(User, make_users(1, 7), batch_size=3, returning=None) == 7
+
+    records = source.create_many(User, make_users(100, 3), returning="records")
+    assert [record.id for record in records] == [100, 101, 102]
+    assert records[0].email == "user100@example.com"
+
+
+def test_create_many_empty(source):
+    assert source.create_many(User, []) == []
+    assert source.create_many(User, [], returning=None) == 0
+
+
+def test_upsert_many_updates_and_inserts(source):
+    source.create_many(User, make_users(1, 3))
+    rows = [
+        {"id": 2, "name": "Renamed", "email": "user2@example.com"},
+        {"id": 4, "name": "User 4", "email": "user4@example.com"},
+        {"id": 4, "name": "User 4 (dup)", "email": "user4@example.com"},
+    ]
+    source.upsert_many(User, rows, conflict_keys=["id"], update_columns=["name"])
+
+    assert source.read(User, 2).name == "Renamed"
+    assert source.read(User, 4).name == "User 4 (dup)"
+    assert len(source.filter(User, {})) == 4
+
+
+def test_upsert_many_skip_existing(source):
+    source.create_many(User, make_users(1, 2))
+    rows = [{"id": 1, "name": "Ignored", "email": "x@example.com"}] + make_users(3, 2)
+    source.upsert_many(User, rows, conflict_keys=["id"], update_columns=[])
+
+    assert source.read(User, 1).name == "User 1"
+    assert len(source.filter(User, {})) == 4
+
+
+@pytest.mark.parametrize("dialect_module, expected", [
+    ("postgresql", "ON CONFLICT (id) DO UPDATE"),
+    ("mysql", "ON DUPLICATE KEY UPDATE"),
+    ("mssql", "MERGE INTO users WITH (HOLDLOCK) AS target"),
+    ("oracle", "MERGE INTO users target USING (SELECT"),
+])
+def test_build_upsert_per_dialect(dialect_module, expected):
+    import importlib
+    from sources.rdbms.helpers.dialect_helper import build_upsert
+
+    dialect = importlib.import_module(f"sqlalchemy.dialects.{dialect_module}").dialect()
+    stmt = build_upsert(dialect, User.__table__, make_users(1, 2), ["id"])
+    assert expected in str(stmt.compile(dialect=dialect))
+
+
+@pytest.mark.parametrize("dialect_module, expected", [
+    ("sqlite", "(users.id, users.name) IN"),
+    ("postgresql", "(users.id, users.name) IN"),
+    ("mssql", "users.id = :id_1 AND users.name = :name_1 OR users.id = :id_2 AND users.name = :name_2"),
+])
+def test_key_in_matches_key_combinations(dialect_module, expected):
+    import importlib
+    from sources.rdbms.helpers.dialect_helper import key_in
+
+    dialect = importlib.import_module(f"sqlalchemy.dialects.{dialect_module}").dialect()
+    columns = [User.__table__.c.id, User.__table__.c.name]
+    assert expected in str(key_in(dialect, columns, [(1, "a"), (2, "b")]).compile(dialect=dialect))
+
+
+def test_iter_filter_streams_records_and_batches(source):
+    source.create_many(User, make_users(1, 12))
+
+    assert [user.id for user in source.iter_filter(User, {}, batch_size=5)] == list(range(1, 13))
+    batches = list(source.iter_filter(User, {}, batch_size=5, batches=True))
+    assert [len(batch) for batch in batches] == [5, 5, 2]
+    assert [user.name for user in source.iter_filter(User, {"id": 3})] == ["User 3"]
+
+
+def test_update_and_delete_single_record(source):
+    source.create_many(User, make_users(1, 2))
+    source.update(User, 1, {"name": "Updated"})
+    assert source.read(User, 1).name == "Updated"
+
+    source.delete(User, 2)
+    assert source.read(User, 2) is None
+    with pytest.raises(ValueError):
+        source.update(User, 2, {"name": "Missing"})
+    with pytest.raises(ValueError):
+        source.delete(User, 2)
+
+
+def test_update_where_and_delete_where(source):
+    users = make_users(1, 6)
+    for user in users[:3]:
+        user["email"] = "shared@example.com"
+    source.create_many(User, users)
+
+    assert source.update_where(User, {"email": "shared@example.com"}, {"name": "Shared"}) == 3
+    assert len(source.filter(User, {"name": "Shared"})) == 3
+    assert source.delete_where(User, {"name": "Shared"}) == 3
+    assert source.delete_where(User, {}) == 3
+    assert source.filter(User, {}) == []
+
+
+def test_sources_and_helpers_share_registered_engine(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'shared.db'}"
+    source = GenericRDBMSSource(db_url, pool_size=3, max_overflow=1, warmup=2)
+    helper = RDBMSHelper(db_url, pool_size=3, max_overflow=1)
+    other = GenericRDBMSSource(db_url, pool_size=4, max_overflow=1)
+    try:
+        assert source.engine is helper.engine
+        assert other.engine is not source.engine
+
+        Base.metadata.create_all(source.engine)
+        source.create_many(User, make_users(1, 2))
+        stats = source.pool_stats()
+        assert stats["checkouts"] >= 3
+        assert stats["capacity"] == 4
+        assert stats["checked_out"] == 0
+        assert stats["peak_checked_out"] >= 2
+    finally:
+        registry.dispose(source.engine)
+        registry.dispose(other.engine)
+
+
+def test_async_source_crud_bulk_and_streaming(tmp_path):
+    import asyncio
+    pytest.importorskip("aiosqlite")
+    from sources.rdbms.sources.async_generic_rdbms_source import AsyncGenericRDBMSSource
+
+    async def scenario():
+        source = AsyncGenericRDBMSSource(f"sqlite:///{tmp_path / 'async.db'}")
+        try:
+            async with source.engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+
+            assert await source.create_many(User, make_users(1, 5), batch_size=2) == [1, 2, 3, 4, 5]
+            await source.create(User, {"id": 6, "name": "User 6", "email": "user6@example.com"})
+            await source.upsert_many(User, [{"id": 1, "name": "Upserted"}], conflict_keys=["id"])
+            await source.update(User, 2, {"name": "Updated"})
+            assert await source.update_where(User, {"name": "User 3"}, {"email": "three@example.com"}) == 1
+            await source.delete(User, 6)
+            assert await source.delete_where(User, {"id": 5}) == 1
+
+            assert (await source.read(User, 1)).name == "Upserted"
+            assert [user.name for user in await source.filter(User, {"id": 2})] == ["Updated"]
+            streamed = [batch async for batch in source.iter_filter(User, {}, batch_size=3, batches=True)]
+            assert [[user.id for user in batch] for batch in streamed] == [[1, 2, 3], [4]]
+        finally:
+            await registry.dispose(source.engine)
+
+    asyncio.run(scenario())
+
+
+def test_filter_operators_and_boolean_combinations(source):
+    users = make_users(1, 10)
+    users[2]["email"] = None
+    source.create_many(User, users)
+
+    assert [u.id for u in source.filter(User, {"id__gt": 8})] == [9, 10]
+    assert [u.id for u in source.filter(User, {"email__isnull": True})] == [3]
+    assert [u.id for u in source.filter(User, {"id__in": [1, 4], "name__like": "User %"})] == [1, 4]
+    either = source.filter(User, {"or": [{"id__lte": 1}, {"id__gte": 10}]}, order_by="id")
+    assert [u.id for u in either] == [1, 10]
+    assert len(source.filter(User, {"not": {"id__lt": 5}})) == 6
+    assert source.update_where(User, {"id__gte": 9}, {"name": "Tail"}) == 2
+    with pytest.raises(ValueError):
+        source.filter(User, {"id__between": 1})
+
+
+def test_filter_keyset_pagination_and_projection(source):
+    source.create_many(User, make_users(1, 7))
+
+    pages, after = [], None
+    while True:
+        page = source.filter(User, {}, order_by="-id", limit=3, after=after, columns=["id", "name"])
+        if not page:
+            break
+        pages.append([row.id for row in page])
+        after = page[-1].id
+    assert pages == [[7, 6, 5], [4, 3, 2], [1]]
+
+    assert [u.id for u in source.filter(User, {}, after=5)] == [6, 7]
+    assert [tuple(row) for row in source.iter_filter(User, {"id__lt": 3}, columns=["id"], order_by="id")] == [(1,), (2,)]
+
+
+def test_keyset_pagination_with_duplicate_sort_values(source):
+    source.create_many(User, [{"id": i, "name": "Same" if i < 6 else f"User {i}", "email": f"u{i}@example.com"}
+                              for i in range(1, 9)])
+
+    seen, after = [], None
+    while True:
+        page = source.filter(User, {}, order_by="name", limit=3, after=after)
+        if not page:
+            break
+        seen.extend(user.id for user in page)
+        after = (page[-1].name, page[-1].id)
+    assert seen == [1, 2, 3, 4, 5, 6, 7, 8]
+    with pytest.raises(ValueError):
+        source.filter(User, {}, order_by="name", after="Same")
+
+
+def test_read_cache_lru_ttl_and_negative_entries():
+    from sources.rdbms.helpers.read_cache import ReadCache
+
+    now = [0.0]
+    cache = ReadCache(max_size=2, ttl=10, negative_ttl=1, clock=lambda: now[0])
+    cache.put(User, 1, "one")
+    cache.put(User, 2, "two")
+    cache.get(User, 1)
+    cache.put(User, 3, "three")
+    assert cache.get(User, 2) == (False, None)
+    cache.put(User, 4, None)
+    assert cache.get(User, 4) == (True, None)
+
+    now[0] = 5
+    assert cache.get(User, 4) == (False, None)
+    assert cache.get(User, 3) == (True, "three")
+    now[0] = 11
+    assert cache.get(User, 3) == (False, None)
+    assert cache.stats()["evictions"] == 2
+
+    generation = cache.generation()
+    cache.invalidate(User, 5)
+    cache.put(User, 5, "stale", generation)
+    cache.put(User, 6, "fresh", generation)
+    assert cache.get(User, 5) == (False, None)
+    assert cache.get(User, 6) == (True, "fresh")
+    cache.invalidate_model(User)
+    cache.put(User, 6, "stale", generation)
+    assert cache.get(User, 6) == (False, None)
+    assert cache.stats()["stale_puts"] == 2
+
+
+def test_read_cache_invalidated_by_source_writes(tmp_path):
+    from sources.rdbms.helpers.read_cache import ReadCache
+
+    source = GenericRDBMSSource(f"sqlite:///{tmp_path / 'cache.db'}", read_cache=ReadCache(negative_ttl=60))
+    Base.metadata.create_all(source.engine)
+    try:
+        assert source.read(User, 1) is None
+        source.create(User, {"id": 1, "name": "First", "email": "first@example.com"})
+        assert source.read(User, 1).name == "First"
+        assert source.read(User, 1) is source.read(User, 1)
+
+        source.update(User, 1, {"name": "Second"})
+        assert source.read(User, 1).name == "Second"
+        source.update_where(User, {"id": 1}, {"name": "Third"})
+        assert source.read(User, 1).name == "Third"
+        source.delete(User, 1)
+        assert source.read(User, 1) is None
+
+        stats = source.cache_stats()
+        assert stats["hits"] == 2
+        assert stats["negative_hits"] == 0
+        assert stats["misses"] == 5
+    finally:
+        registry.dispose(source.engine)
+
+
+def test_read_many_chunks_and_preserves_order(source):
+    source.create_many(User, make_users(1, 10))
+
+    records = source.read_many(User, [7, 99, 2, 7, 5], chunk_size=2)
+    assert [record.id if record else None for record in records] == [7, None, 2, 7, 5]
+    by_id = source.read_many(User, [3, 42], as_dict=True)
+    assert by_id[3].name == "User 3" and by_id[42] is None
+
+
+def test_read_many_uses_read_cache(tmp_path):
+    from sources.rdbms.helpers.read_cache import ReadCache
+
+    source = GenericRDBMSSource(f"sqlite:///{tmp_path / 'many.db'}", read_cache=ReadCache(negative_ttl=60))
+    Base.metadata.create_all(source.engine)
+    try:
+        source.create_many(User, make_users(1, 3))
+        cached = source.read(User, 1)
+        records = source.read_many(User, [1, 2, 4])
+        assert records[0] is cached
+        assert records[2] is None
+        assert source.read(User, 2) is records[1]
+        assert source.read(User, 4) is None
+        assert source.cache_stats()["negative_hits"] == 1
+    finally:
+        registry.dispose(source.engine)
+
+
+def test_row_modes_skip_orm_instances(source):
+    source.create_many(User, make_users(1, 5))
+
+    rows = source.filter(User, {"id__lte": 2}, order_by="id", mode="rows")
+    assert [tuple(row) for row in rows] == [(1, "User 1", "user1@example.com"), (2, "User 2", "user2@example.com")]
+    dicts = source.filter(User, {"id": 3}, mode="dicts", columns=["id", "name"])
+    assert dicts == [{"id": 3, "name": "User 3"}]
+    assert source.filter(User, {}, order_by="id", mode="columns", columns=["id"]) == {"id": [1, 2, 3, 4, 5]}
+
+    assert source.read(User, 4, mode="dicts") == {"id": 4, "name": "User 4", "email": "user4@example.com"}
+    assert source.read(User, 42, mode="rows") is None
+    streamed = list(source.iter_filter(User, {}, batch_size=2, order_by="id", mode="columns", columns=["id"]))
+    assert streamed == [{"id": [1, 2]}, {"id": [3, 4]}, {"id": [5]}]
+    assert next(source.iter_filter(User, {}, order_by="-id", mode="dicts"))["id"] == 5
+
+
+def test_ingest_csv_chunks_with_skip_existing(source, tmp_path):
+    from sources.rdbms.helpers.ingest_helper import ingest_csv
+
+    source.create(User, {"id": 1, "name": "Existing", "email": "existing@example.com"})
+    csv_path = tmp_path / "users.csv"
+    lines = ["id,name,email"] + [f"{i},User {i},user{i}@example.com" for i in range(1, 8)]
+    csv_path.write_text("\n".join(lines) + "\n")
+
+    reports = []
+    report = ingest_csv(source, User, csv_path, chunk_size=3, conflict_keys=["id"],
+                        update_columns=[], progress=reports.append)
+    assert report["rows"] == 7
+    assert report["chunks"] == 3 and len(reports) == 3
+    assert report["rows_per_sec"] > 0
+    assert source.read(User, 1).name == "Existing"
+    assert source.read(User, 7).email == "user7@example.com"
+
+
+def test_ingest_csv_rejects_invalid_values(source, tmp_path):
+    from sources.rdbms.helpers.ingest_helper import ingest_csv
+
+    csv_path = tmp_path / "bad.csv"
+    csv_path.write_text("id,name,email\n1,A,a@example.com\nnot-a-number,B,b@example.com\n")
+    with pytest.raises(ValueError, match="chunk 1"):
+        ingest_csv(source, User, csv_path)
+
+
+def test_copy_upsert_rows_are_deduplicated_on_conflict_keys():
+    from sources.rdbms.helpers.dialect_helper import last_row_per_key
+
+    rows = [(1, "a"), (2, "b"), (1, "c")]
+    assert last_row_per_key(["id", "name"], rows, ["id"]) == [(1, "c"), (2, "b")]
+
+
+def test_copy_query_out_streams_psycopg3_chunks():
+    import contextlib
+    import io
+    from types import SimpleNamespace
+    from sqlalchemy import select
+    from sources.rdbms.helpers.dialect_helper import copy_query_out
+
+    payload = 'id,name\n1,"two\nlines"\n2,Zoë\n'.encode()
+    split = payload.index("ë".encode()) + 1
+
+    class Cursor:
+        rowcount = -1
+
+        @contextlib.contextmanager
+        def copy(self, sql):
+            assert sql.startswith("COPY (SELECT")
+            yield iter([memoryview(payload[:split]), memoryview(payload[split:])])
+            self.rowcount = 2
+
+        def close(self):
+            pass
+
+    connection = SimpleNamespace(connection=SimpleNamespace(dbapi_connection=SimpleNamespace(cursor=Cursor)))
+    out = io.StringIO()
+    assert copy_query_out(connection, select(User.id, User.name), out) == 2
+    assert out.getvalue() == payload.decode()
+
+
+def test_copy_rows_formatting_keeps_nulls_and_empty_strings_apart():
+    from sources.rdbms.helpers.dialect_helper import format_copy_rows
+
+    assert format_copy_rows([(1, None, ""), (2, 'say "hi"', {"a": 1})]) == (
+        '1,,""\n2,"say ""hi""","{""a"": 1}"\n'
+    )
+
+
+@pytest.mark.parametrize("compression, opener", [(None, open), ("gzip", "gzip")])
+def test_export_csv_streams_filtered_columns(source, tmp_path, compression, opener):
+    import gzip
+    from sources.rdbms.helpers.export_helper import export_csv
+
+    source.create_many(User, make_users(1, 5))
+    output_path = tmp_path / "users.csv"
+    report = export_csv(source, User, output_path, columns=["id", "email"], filters={"id__gt": 2},
+                        compression=compression, batch_size=2)
+
+    assert report["rows"] == 3
+    opener = gzip.open if opener == "gzip" else open
+    with opener(output_path, "rt") as f:
+        assert f.read().splitlines() == [
+            "id,email", "3,user3@example.com", "4,user4@example.com", "5,user5@example.com",
+        ]
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_arrow_round_trip(source, tmp_path, file_format):
+    pytest.importorskip("pyarrow")
+    from sources.rdbms.helpers import arrow_helper
+
+    users = make_users(1, 5)
+    users[1]["email"] = None
+    source.create_many(User, users)
+    path = tmp_path / f"users.{file_format}"
+    export = getattr(arrow_helper, f"export_{file_format}")
+    assert export(source, User, path, batch_size=2)["rows"] == 5
+
+    source.delete_where(User, {})
+    load = getattr(arrow_helper, f"import_{file_format}")
+    assert load(source, User, path, batch_size=3)["rows"] == 5
+    assert source.filter(User, {}, order_by="id", mode="dicts") == users
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_arrow_round_trip_keeps_numeric_precision(tmp_path, file_format):
+    pytest.importorskip("pyarrow")
+    from decimal import Decimal
+    from sqlalchemy import Column, Integer, Numeric
+    from sqlalchemy.orm import declarative_base
+    from sources.rdbms.helpers import arrow_helper
+
+    LocalBase = declarative_base()
+
+    class Price(LocalBase):
+        __tablename__ = "prices"
+        id = Column(Integer, primary_key=True)
+        amount = Column(Numeric(12, 2))
+        rate = Column(Numeric)
+
+    source = GenericRDBMSSource(f"sqlite:///{tmp_path / 'prices.db'}")
+    LocalBase.metadata.create_all(source.engine)
+    try:
+        schema = arrow_helper.arrow_schema(Price)
+        assert str(schema.field("amount").type) == "decimal128(12, 2)"
+        assert str(schema.field("rate").type) == "string"
+
+        rows = [{"id": 1, "amount": Decimal("1.10"), "rate": Decimal("0.125")},
+                {"id": 2, "amount": Decimal("9999999999.99"), "rate": None}]
+        source.create_many(Price, rows)
+        path = tmp_path / f"prices.{file_format}"
+        assert getattr(arrow_helper, f"export_{file_format}")(source, Price, path)["rows"] == 2
+        source.delete_where(Price, {})
+        assert getattr(arrow_helper, f"import_{file_format}")(source, Price, path)["rows"] == 2
+        assert source.filter(Price, {}, order_by="id", mode="dicts") == rows
+    finally:
+        registry.dispose(source.engine)
+
+
+@pytest.mark.parametrize("strategy", ["minmax", "quantiles"])
+def test_parallel_export_partitions_and_manifest(source, tmp_path, strategy):
+    from sources.rdbms.helpers.parallel_export import parallel_export, plan_partitions
+
+    users = make_users(1, 10) + make_users(500, 10)
+    source.create_many(User, users)
+    plans = plan_partitions(source, User, 4, strategy)
+    assert sum(len(source.filter(User, plan)) for plan in plans) == 20
+
+    output_dir = tmp_path / "export"
+    completed = []
+    manifest = parallel_export(str(source.engine.url), User, output_dir, workers=2, partitions=4,
+                               strategy=strategy, progress=lambda report, done, total: completed.append(done))
+    assert manifest["rows"] == 20
+    assert sorted(completed) == list(range(1, len(plans) + 1))
+    assert json.loads((output_dir / "manifest.json").read_text())["rows"] == 20
+    exported = set()
+    for partition in manifest["partitions"]:
+        with open(partition["path"]) as f:
+            exported.update(int(line.split(",")[0]) for line in f.read().splitlines()[1:])
+    assert exported == {user["id"] for user in users}
+
+
+def test_minmax_partitions_stop_at_the_max_key(source):
+    from sources.rdbms.helpers.parallel_export import plan_partitions
+
+    source.create_many(User, make_users(1, 3))
+    plans = plan_partitions(source, User, 8)
+    assert plans == [{"id__lte": 1}, {"id__gt": 1, "id__lte": 2}, {"id__gt": 2}]
+
+
+def test_unified_source_routes_per_backend_and_fans_out(tmp_path):
+    from sources.rdbms.sources.unified_rdbms_source import UnifiedRDBMSSource
+
+    unified = UnifiedRDBMSSource(
+        postgres_url=f"sqlite:///{tmp_path / 'pg.db'}",
+        mysql_url=f"sqlite:///{tmp_path / 'my.db'}",
+    )
+    try:
+        pg, my = unified.backends["postgres"], unified.backends["mysql"]
+        assert pg.engine is not my.engine
+        for backend in (pg, my):
+            Base.metadata.create_all(backend.engine)
+
+        unified.create_many(User, make_users(1, 3))
+        unified.create_many(User, make_users(10, 2), backend="mysql")
+        assert len(pg.filter(User, {})) == 3
+        unified.route(User, "mysql")
+        assert [u.id for u in unified.filter(User, {}, order_by="id")] == [10, 11]
+
+        merged = unified.fan_out_filter(User, {"id__gt": 1}, mode="dicts")
+        assert sorted(row["id"] for row in merged) == [2, 3, 10, 11]
+        stats = unified.latency_stats()
+        assert stats["postgres"]["calls"] == 2 and stats["mysql"]["calls"] == 3
+        with pytest.raises(ValueError):
+            unified.read(User, 1, backend="oracle")
+    finally:
+        unified.close()
+        for backend in unified.backends.values():
+            registry.dispose(backend.engine)
+
+
+def test_replica_routing_read_your_writes_and_ejection(tmp_path):
+    from sqlalchemy.exc import OperationalError
+
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    missing_url = f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+    source = GenericRDBMSSource(f"sqlite:///{tmp_path / 'primary.db'}", replica_urls=[replica_url, missing_url],
+                                read_your_writes=60.0)
+    try:
+        Base.metadata.create_all(source.engine)
+        replica = GenericRDBMSSource(replica_url)
+        Base.metadata.create_all(replica.engine)
+        replica.create_many(User, make_users(100, 2))
+        assert source.check_replicas() == {replica_url: True, missing_url: False}
+
+        for _ in range(3):
+            assert [u.id for u in source.filter(User, {}, order_by="id")] == [100, 101]
+        assert source.replica_stats()[replica_url]["latency_ms"] > 0
+
+        source.create(User, {"id": 1, "name": "Primary", "email": "primary@example.com"})
+        # Pinned to the primary inside the read-your-writes window.
+        assert [u.id for u in source.filter(User, {})] == [1]
+
+        # A connection error on a replica ejects it automatically.
+        source.read_your_writes = 0.0
+        missing = source.replicas.replicas[1]
+        missing.ejected_until = 0.0
+        with pytest.raises(OperationalError):
+            for _ in range(2):
+                source.read(User, 100, mode="dicts")
+        assert source.replica_stats()[missing_url] == {"available": False, "latency_ms": 0.0, "failures": 2}
+        assert source.read(User, 100, mode="dicts")["name"] == "User 100"
+    finally:
+        engines = [replica.engine for replica in source.replicas.replicas]
+        source.close()
+        for engine in engines:
+            registry.dispose(engine)
+        registry.dispose(source.engine)
+
+
+def test_replica_listeners_are_shared_and_removed_on_close(tmp_path):
+    from sqlalchemy import event
+
+    replica_url = f"sqlite:///{tmp_path / 'replica.db'}"
+    sources = [
+        GenericRDBMSSource(f"sqlite:///{tmp_path / 'primary.db'}", replica_urls=[replica_url],
+                           health_check_interval=60)
+        for _ in range(2)
+    ]
+    replica = sources[0].replicas.replicas[0]
+    try:
+        assert sources[1].replicas.replicas[0] is replica
+        assert event.contains(replica.engine, "handle_error", replica._failed)
+        sources[0].close()
+        assert event.contains(replica.engine, "handle_error", replica._failed)
+        sources[1].close()
+        assert not event.contains(replica.engine, "handle_error", replica._failed)
+        assert not any(thread.name == "replica-health" for thread in threading.enumerate())
+    finally:
+        for source in sources:
+            source.close()
+        registry.dispose(replica.engine)
+        registry.dispose(sources[0].engine)
+
+
+def test_transaction_reads_see_set_based_writes(source):
+    source.create_many(User, make_users(1, 3))
+    with source.transaction():
+        loaded = source.read(User, 1)
+        source.update(User, 1, {"name": "b"})
+        assert loaded.name == "b"
+        assert source.read(User, 1).name == "b"
+        assert source.filter(User, {"id": 1})[0].name == "b"
+        source.update_where(User, {"id__gte": 2}, {"name": "c"})
+        assert [u.name for u in source.filter(User, {}, order_by="id")] == ["b", "c", "c"]
+        source.delete(User, 3)
+        assert source.read(User, 3) is None
+    assert source.read(User, 1).name == "b"
+
+
+def test_transaction_shares_one_commit_with_savepoints(source):
+    from sqlalchemy import event
+    from sqlalchemy.exc import IntegrityError
+
+    commits = []
+
+    def on_commit(conn):
+        commits.append(conn)
+
+    event.listen(source.engine, "commit", on_commit)
+    with source.transaction(flush_every=10) as tx:
+        for row in make_users(1, 25):
+            source.create(User, row)
+        source.update(User, 3, {"name": "Renamed"})
+        assert len(source.filter(User, {})) == 25
+        with pytest.raises(IntegrityError):
+            with tx.savepoint():
+                source.create(User, {"id": 100, "name": "Kept out", "email": "x@example.com"})
+                source.create(User, {"id": 1, "name": "Duplicate", "email": "x@example.com"})
+        source.delete(User, 25)
+    event.remove(source.engine, "commit", on_commit)
+    assert len(commits) == 1
+
+    assert source.read(User, 3).name == "Renamed"
+    assert source.read(User, 100) is None
+    assert len(source.filter(User, {})) == 24
+
+    with pytest.raises(ValueError):
+        with source.transaction():
+            source.create(User, {"id": 200, "name": "Rolled back", "email": "r@example.com"})
+            source.update(User, 999, {"name": "Missing"})
+    assert source.read(User, 200) is None
+
+
+def test_metrics_record_operations_and_render_prometheus(tmp_path):
+    from sqlalchemy.exc import IntegrityError
+    from sources.rdbms.helpers.metrics import MetricsRegistry
+
+    metrics = MetricsRegistry()
+    source = GenericRDBMSSource(f"sqlite:///{tmp_path / 'metrics.db'}", metrics=metrics)
+    try:
+        Base.metadata.create_all(source.engine)
+        source.create_many(User, make_users(1, 5), batch_size=2)
+        source.filter(User, {"id__gt": 2})
+        list(source.iter_filter(User, {}, batch_size=2, batches=True))
+        with pytest.raises(IntegrityError):
+            source.create(User, {"id": 1, "name": "Duplicate", "email": "d@example.com"})
+
+        labels = {"dialect": "sqlite", "model": "User"}
+        assert metrics.get("rdbms_operation_rows_total").value(operation="filter", **labels) == 3
+        assert metrics.get("rdbms_operation_rows_total").value(operation="iter_filter", **labels) == 5
+        assert metrics.get("rdbms_operation_statements").sum(operation="create_many", **labels) >= 1
+        assert metrics.get("rdbms_operation_errors_total").value(
+            operation="create", error="IntegrityError", **labels) == 1
+
+        # Nested calls count once, under the outer operation only.
+        rows_total = metrics.get("rdbms_operation_rows_total")
+        source.copy_in(User, ["id", "name", "email"], [(6, "Six", "six@example.com")])
+        assert rows_total.value(operation="copy_in", **labels) == 1
+        assert rows_total.value(operation="create_many", **labels) == 5
+        statements = metrics.get("rdbms_operation_statements")
+        streamed = statements.sum(operation="iter_filter", **labels)
+        for _ in source.iter_filter(User, {"id": 6}):
+            source.filter(User, {"id": 1})
+        assert rows_total.value(operation="filter", **labels) == 4
+        # The consumer's query between yields is not billed to iter_filter.
+        assert statements.sum(operation="iter_filter", **labels) - streamed == 1
+
+        text = metrics.render()
+        assert '# TYPE rdbms_operation_duration_seconds histogram' in text
+        assert 'rdbms_operation_duration_seconds_count{operation="filter",dialect="sqlite",model="User"} 2.0' in text
+        assert "rdbms_pool_checked_out{" in text
+    finally:
+        registry.dispose(source.engine)
+
+
+def test_slow_query_recorder_captures_shapes_caller_and_plan(tmp_path):
+    from sources.rdbms.helpers.slow_query import SlowQueryRecorder
+
+    recorder = SlowQueryRecorder(threshold=0.0, capacity=5, log_path=str(tmp_path / "slow.log"))
+    source = GenericRDBMSSource(f"sqlite:///{tmp_path / 'slow.db'}", slow_query_recorder=recorder)
+    try:
+        Base.metadata.create_all(source.engine)
+        source.create_many(User, make_users(1, 3))
+        recorder.clear()
+        source.filter(User, {"email": "user2@example.com"})
+        recorder.wait(timeout=5)
+
+        (entry,) = [entry for entry in recorder.entries() if entry["sql"].startswith("SELECT")]
+        assert entry["parameters"] == ["str"]
+        assert "user2@example.com" not in json.dumps(entry)
+        assert entry["caller"].endswith("in test_slow_query_recorder_captures_shapes_caller_and_plan")
+        assert "SCAN" in entry["plan"]
+        assert len(recorder.entries(limit=1)) == 1
+
+        # The same SQL is not explained again within the interval.
+        source.filter(User, {"email": "user3@example.com"})
+        assert recorder.stats()["rate_limited"] == 1
+    finally:
+        recorder.close()
+        registry.dispose(source.engine)
+    assert "SCAN" in (tmp_path / "slow.log").read_text()
+
+
+def test_slow_query_explains_are_bounded_and_writes_not_analyzed(tmp_path):
+    from sources.rdbms.helpers.slow_query import SlowQueryRecorder, explain_prefix
+
+    assert explain_prefix("postgresql", "SELECT 1") == "EXPLAIN (ANALYZE, BUFFERS) "
+    assert explain_prefix("postgresql", "UPDATE users SET name = 'x'") == "EXPLAIN "
+    assert explain_prefix("postgresql", "DELETE FROM users", analyze_writes=True) == "EXPLAIN (ANALYZE, BUFFERS) "
+
+    recorder = SlowQueryRecorder(threshold=0.0, max_pending=0)
+    source = GenericRDBMSSource(f"sqlite:///{tmp_path / 'slow.db'}", slow_query_recorder=recorder)
+    try:
+        Base.metadata.create_all(source.engine)
+        recorder.clear()
+        source.filter(User, {})
+        assert recorder.stats()["dropped"] == 1
+        assert [entry["plan"] for entry in recorder.entries()] == ["EXPLAIN skipped: queue full"]
+    finally:
+        recorder.close()
+        registry.dispose(source.engine)
+
+
+def test_benchmark_harness_runs_and_flags_regressions():
+    from sources.rdbms.benchmarks.benchmark_source import compare, percentile, run
+
+    assert percentile([1, 2, 3, 4], 50) == 2.5
+    report = run(["sqlite-memory", "sqlite-file"], rows=50, single_ops=5, filter_ops=2, batch_size=20, repeat=1)
+    assert report["meta"]["isolated"]
+    assert all(result["peak_rss_mb"] for result in report["targets"].values())
+    benchmarks = report["targets"]["sqlite-memory"]["benchmarks"]
+    assert benchmarks["bulk_insert"]["rows"] == 50 and benchmarks["read"]["operations"] == 5
+    assert compare(report, report) == []
+
+    slower = json.loads(json.dumps(report))
+    slower["targets"]["sqlite-memory"]["benchmarks"]["read"]["p95_ms"] *= 2
+    (regression,) = compare(report, slower)
+    assert (regression["benchmark"], regression["metric"]) == ("read", "p95_ms")